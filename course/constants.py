@@ -295,6 +295,8 @@ FLOW_SESSION_EXPIRATION_MODE_CHOICES = (
             pgettext_lazy("Flow expiration mode",
                 "Do not submit session for grading")),
         )
+FLOW_SESSION_EXPIRATION_MODE_VALUES = frozenset(
+        key for key, __ in FLOW_SESSION_EXPIRATION_MODE_CHOICES)
 
 
 def is_expiration_mode_allowed(expmode, permissions):
@@ -428,6 +430,8 @@ FLOW_PERMISSION_CHOICES = (
          pgettext_lazy("Flow permission",
                        "Send emails about the flow page to course staff")),
         )
+FLOW_PERMISSION_VALUES = frozenset(
+        key for key, __ in FLOW_PERMISSION_CHOICES)
 
 # }}}
 
@@ -446,6 +450,8 @@ FLOW_RULE_KIND_CHOICES = (
         (flow_rule_kind.grading,
             pgettext_lazy("Flow rule kind choices", "Grading")),
         )
+FLOW_RULE_KIND_VALUES = frozenset(
+        key for key, __ in FLOW_RULE_KIND_CHOICES)
 
 
 # {{{ grade aggregation strategy
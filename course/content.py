@@ -1326,12 +1326,17 @@ class LinkFixerExtension(Extension):
                         reverse_func=self.reverse_func)
 
 
-def remove_prefix(prefix, s):
-    # type: (Text, Text) -> Text
-    if s.startswith(prefix):
-        return s[len(prefix):]
-    else:
-        return s
+if hasattr(str, "removeprefix"):
+    def remove_prefix(prefix, s):
+        # type: (Text, Text) -> Text
+        return s.removeprefix(prefix)  # type: ignore
+else:
+    def remove_prefix(prefix, s):
+        # type: (Text, Text) -> Text
+        if s.startswith(prefix):
+            return s[len(prefix):]
+        else:
+            return s
 
 
 JINJA_PREFIX = "[JINJA]"
@@ -1488,17 +1493,25 @@ def markup_to_html(
     return result
 
 
-TITLE_RE = re.compile(r"^\#+\s*(.+)", re.UNICODE)
-
-
 def extract_title_from_markup(markup_text):
     # type: (Text) -> Optional[Text]
-    lines = markup_text.split("\n")
+    lines = markup_text.split("\n", 10)
 
     for ln in lines[:10]:
-        match = TITLE_RE.match(ln)
-        if match is not None:
-            return match.group(1)
+        if not ln.startswith("#"):
+            continue
+
+        rest = ln.lstrip("#")
+        title = rest.lstrip()
+        if title:
+            return title
+
+        # Degenerate headings ("##", "#  "), matched the way the former
+        # regex r"^\#+\s*(.+)" did.
+        if rest:
+            return rest[-1]
+        if len(ln) > 1:
+            return "#"
 
     return None
 
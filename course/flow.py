@@ -56,6 +56,7 @@ from course.constants import (
         participation_permission as pperm,
         flow_session_expiration_mode,
         FLOW_SESSION_EXPIRATION_MODE_CHOICES,
+        FLOW_SESSION_EXPIRATION_MODE_VALUES,
         is_expiration_mode_allowed,
         grade_aggregation_strategy,
         GRADE_AGGREGATION_STRATEGY_CHOICES,
@@ -419,7 +420,7 @@ def start_flow(
     if session_start_rule.default_expiration_mode is not None:
         exp_mode = session_start_rule.default_expiration_mode
 
-    assert exp_mode in dict(FLOW_SESSION_EXPIRATION_MODE_CHOICES)
+    assert exp_mode in FLOW_SESSION_EXPIRATION_MODE_VALUES
 
     session = FlowSession(
         course=course,
@@ -2529,8 +2530,7 @@ def update_expiration_mode(pctx, flow_session_id):
                 _("may only change in-progress flow sessions"))
 
     expmode = pctx.request.POST.get("expiration_mode")
-    if not any(expmode == em_key
-            for em_key, _ in FLOW_SESSION_EXPIRATION_MODE_CHOICES):
+    if expmode not in FLOW_SESSION_EXPIRATION_MODE_VALUES:
         raise SuspiciousOperation(_("invalid expiration mode"))
 
     fctx = FlowContext(pctx.repo, pctx.course, flow_session.flow_id,
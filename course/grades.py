@@ -25,6 +25,7 @@ THE SOFTWARE.
 """
 
 import re
+from itertools import groupby
 from decimal import Decimal
 from typing import cast
 
@@ -33,6 +34,7 @@ from django.utils.translation import (
 from django.shortcuts import (  # noqa
         render, redirect, get_object_or_404)
 from django.contrib import messages  # noqa
+from django.core.cache import cache
 from django.core.exceptions import (
         PermissionDenied, SuspiciousOperation, ObjectDoesNotExist)
 from django.db import connection
@@ -48,19 +50,20 @@ from bootstrap3_datetime.widgets import DateTimePicker
 
 from course.utils import course_view, render_course_page
 from course.models import (
-        Participation, participation_status,
+        Participation,
         GradingOpportunity, GradeChange, GradeStateMachine,
-        grade_state_change_types,
         FlowSession, FlowPageVisit)
 from course.flow import adjust_flow_session_page_data
 from course.views import get_now_or_fake_time
 from course.constants import (
         participation_permission as pperm,
+        participation_status,
+        grade_state_change_types,
         )
 
 # {{{ for mypy
 
-from typing import Tuple, Text, Optional, Any, Iterable, List, Union, TYPE_CHECKING  # noqa
+from typing import Tuple, Text, Optional, Any, Iterable, List, Union, Dict, TYPE_CHECKING  # noqa
 if TYPE_CHECKING:
     from course.utils import CoursePageContext  # noqa
     from course.content import FlowDesc  # noqa
@@ -143,10 +146,7 @@ def view_participant_grades(pctx, participation_id=None):
         state_machine = GradeStateMachine()
         state_machine.consume(my_grade_changes)
 
-        grade_table.append(
-                GradeInfo(
-                    opportunity=opp,
-                    grade_state_machine=state_machine))
+        grade_table.append((opp, state_machine))
 
     return render_course_page(pctx, "course/gradebook-participant.html", {
         "grade_table": grade_table,
@@ -201,81 +201,109 @@ def view_grading_opportunity_list(pctx):
 
 # {{{ teacher grade book
 
-class GradeInfo:
-    def __init__(self, opportunity, grade_state_machine):
-        # type: (GradingOpportunity, GradeStateMachine) -> None
-        self.opportunity = opportunity
-        self.grade_state_machine = grade_state_machine
+GRADEBOOK_CACHE_TIMEOUT = 60
 
 
-def get_grade_table(course):
-    # type: (Course) -> Tuple[List[Participation], List[GradingOpportunity], List[List[GradeInfo]]]  # noqa
+def get_gradebook_cache_keys(course_pk):
+    # type: (int) -> Tuple[Text, Text]
+    return ("gradebook:opps:%d" % course_pk,
+            "gradebook:participations:%d" % course_pk)
 
-    # NOTE: It's important that these queries are sorted consistently,
-    # also consistently with the code below.
-    grading_opps = list((GradingOpportunity.objects
+
+def clear_gradebook_cache(course_pk):
+    # type: (int) -> None
+    cache.delete_many(get_gradebook_cache_keys(course_pk))
+
+
+def _get_gradebook_grading_opps(course):
+    # type: (Course) -> List[GradingOpportunity]
+    return list((GradingOpportunity.objects
             .filter(
                 course=course,
                 shown_in_grade_book=True,
                 )
             .order_by("identifier")))
 
-    participations = list(Participation.objects
+
+def _get_gradebook_participations(course):
+    # type: (Course) -> List[Participation]
+    return list(Participation.objects
             .filter(
                 course=course,
                 status=participation_status.active)
             .order_by("id")
             .select_related("user"))
 
-    grade_changes = list(GradeChange.objects
-            .filter(
-                opportunity__course=course,
-                opportunity__shown_in_grade_book=True)
-            .order_by(
-                "participation__id",
-                "opportunity__identifier",
-                "grade_time")
-            .select_related("participation")
-            .select_related("participation__user")
-            .select_related("opportunity"))
 
-    idx = 0
+# Shared by all grade book cells without any grade changes, which in a
+# sparse grade book are most of them. Must not be modified.
+_EMPTY_GRADE_STATE_MACHINE = GradeStateMachine().consume(())
 
-    grade_table = []
-    for participation in participations:
-        while (
-                idx < len(grade_changes)
-                and grade_changes[idx].participation.id < participation.id):
-            idx += 1
 
-        grade_row = []
-        for opp in grading_opps:
-            while (
-                    idx < len(grade_changes)
-                    and grade_changes[idx].participation.pk == participation.pk
-                    and grade_changes[idx].opportunity.identifier < opp.identifier
-                    ):
-                idx += 1
+def get_grade_table(course):
+    # type: (Course) -> Tuple[List[Participation], List[GradingOpportunity], Dict[int, Dict[int, GradeStateMachine]]]  # noqa
 
-            my_grade_changes = []
-            while (
-                    idx < len(grade_changes)
-                    and grade_changes[idx].opportunity.pk == opp.pk
-                    and grade_changes[idx].participation.pk == participation.pk):
-                my_grade_changes.append(grade_changes[idx])
-                idx += 1
+    """
+    :returns: a tuple ``(participations, grading_opps, grade_state_machines)``,
+        where ``grade_state_machines[participation.pk][opp.pk]`` is the
+        :class:`course.models.GradeStateMachine` for that participation and
+        grading opportunity.
+    """
 
-            state_machine = GradeStateMachine()
-            state_machine.consume(my_grade_changes)
+    # NOTE: It's important that these queries are sorted consistently,
+    # also consistently with the code below.
+
+    # These change far less often than grades do, so they are kept in the
+    # cache for a short while. Changes to grading opportunities,
+    # participations, their roles and their users clear them, see
+    # course.receivers.
+    opps_cache_key, participations_cache_key = get_gradebook_cache_keys(course.pk)
 
-            grade_row.append(
-                    GradeInfo(
-                        opportunity=opp,
-                        grade_state_machine=state_machine))
+    grading_opps = cache.get_or_set(
+            opps_cache_key,
+            lambda: _get_gradebook_grading_opps(course),
+            GRADEBOOK_CACHE_TIMEOUT)
 
-        grade_table.append(grade_row)
+    participations = cache.get_or_set(
+            participations_cache_key,
+            lambda: _get_gradebook_participations(course),
+            GRADEBOOK_CACHE_TIMEOUT)
 
-    return participations, grading_opps, grade_table
+    grade_changes = (GradeChange.objects
+            .filter(
+                opportunity__course=course,
+                opportunity__shown_in_grade_book=True,
+                participation__status=participation_status.active)
+            .order_by(
+                "participation_id",
+                "opportunity_id",
+                "grade_time")
+            .select_related("opportunity")
+            # only what GradeStateMachine.consume looks at
+            .only(
+                "participation", "state", "attempt_id",
+                "points", "max_points", "due_time", "grade_time",
+                "opportunity__due_time", "opportunity__aggregation_strategy"))
+
+    # The grade changes arrive ordered by (participation, opportunity), so
+    # each cell's changes are contiguous and can be consumed in a single
+    # streaming pass, without bucketing them first or querying once per cell.
+    grade_state_machines_by_key = {
+            key: GradeStateMachine().consume(gchanges)
+            for key, gchanges in groupby(
+                grade_changes.iterator(chunk_size=2000),
+                key=lambda gchange: (
+                    gchange.participation_id, gchange.opportunity_id))
+            }  # type: Dict[Tuple[int, int], GradeStateMachine]
+
+    grade_state_machines = {
+            participation.pk: {
+                opp.pk: grade_state_machines_by_key.get(
+                    (participation.pk, opp.pk), _EMPTY_GRADE_STATE_MACHINE)
+                for opp in grading_opps}
+            for participation in participations}
+
+    return participations, grading_opps, grade_state_machines
 
 
 @course_view
@@ -283,17 +311,17 @@ def view_gradebook(pctx):
     if not pctx.has_permission(pperm.view_gradebook):
         raise PermissionDenied(_("may not view grade book"))
 
-    participations, grading_opps, grade_table = get_grade_table(pctx.course)
+    participations, grading_opps, grade_state_machines = (
+            get_grade_table(pctx.course))
 
-    def grade_key(entry):
-        (participation, grades) = entry
+    def grade_key(participation):
         return (participation.user.last_name.lower(),
                     participation.user.first_name.lower())
 
-    grade_table = sorted(zip(participations, grade_table), key=grade_key)
+    participations = sorted(participations, key=grade_key)
 
     return render_course_page(pctx, "course/gradebook.html", {
-        "grade_table": grade_table,
+        "grade_state_machines": grade_state_machines,
         "grading_opportunities": grading_opps,
         "participations": participations,
         "grade_state_change_types": grade_state_change_types,
@@ -305,7 +333,8 @@ def export_gradebook_csv(pctx):
     if not pctx.has_permission(pperm.batch_export_grade):
         raise PermissionDenied(_("may not batch-export grades"))
 
-    participations, grading_opps, grade_table = get_grade_table(pctx.course)
+    participations, grading_opps, grade_state_machines = (
+            get_grade_table(pctx.course))
 
     from io import StringIO
     csvfile = StringIO()
@@ -319,13 +348,14 @@ def export_gradebook_csv(pctx):
 
     writer.writerow(fieldnames)
 
-    for participation, grades in zip(participations, grade_table):
+    for participation in participations:
+        participation_gsms = grade_state_machines[participation.pk]
         writer.writerow([
             participation.user.username,
             participation.user.last_name,
             participation.user.first_name,
-            ] + [grade_info.grade_state_machine.stringify_machine_readable_state()
-                for grade_info in grades])
+            ] + [participation_gsms[gopp.pk].stringify_machine_readable_state()
+                for gopp in grading_opps])
 
     response = http.HttpResponse(
             csvfile.getvalue().encode("utf-8"),
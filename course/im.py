@@ -45,8 +45,11 @@ from course.utils import course_view, render_course_page
 import sleekxmpp
 
 import threading
+from queue import Empty, Queue
+from time import monotonic
+from traceback import print_exc
 
-from typing import List, Dict  # noqa
+from typing import Dict, Tuple, Optional, Text  # noqa
 
 
 # {{{ instant message
@@ -70,71 +73,98 @@ class InstantMessageForm(forms.Form):
         super(InstantMessageForm, self).__init__(*args, **kwargs)
 
 
-_xmpp_connections = {}  # type: Dict[int, CourseXMPP]
-_disconnectors = []  # type: List[Disconnector]
+# Connections are kept for this many seconds after being established.
+XMPP_CONNECTION_LIFETIME = 60
+
+# Seconds for which CourseXMPP.is_recipient_online may reuse its last answer
+# (presence changes from the recipient always invalidate it).
+RECIPIENT_ONLINE_MAX_AGE = 5
+
+# Only changed by the worker thread below, so no locking is needed. Requests
+# merely look up entries, which is atomic.
+_xmpp_connections = {}  # type: Dict[int, Tuple[CourseXMPP, float]]
+
+# Connecting and sending happen on a worker thread, which owns the
+# connections, so that requests never wait for the XMPP server. Items are
+# (course, message body), where a body of *None* only asks for a connection.
+_xmpp_queue = Queue()  # type: Queue[Tuple[Course, Optional[Text]]]
+_xmpp_worker = None  # type: Optional[threading.Thread]
+_xmpp_worker_lock = threading.Lock()
 
 
 class CourseXMPP(sleekxmpp.ClientXMPP):
     def __init__(self, jid, password, recipient_jid):
         sleekxmpp.ClientXMPP.__init__(self, jid, password)
-        self.recipient_jid = recipient_jid
+        self.recipient_jid = sleekxmpp.JID(recipient_jid).bare
+
+        # (is online, monotonic time checked)
+        self._recipient_online = None  # type: Optional[Tuple[bool, float]]
 
         self.add_event_handler("session_start", self.start)
         self.add_event_handler("changed_status", self.wait_for_presences)
 
         self.received = set()
+        self._received_count = 0
+        self._expected_presences = None  # type: Optional[int]
 
         self.presences_received = threading.Event()
 
     def start(self, event):
         self.send_presence()
         self.get_roster()
+        self._expected_presences = len(self.client_roster.keys())
 
     def is_recipient_online(self):
-        groups = self.client_roster.groups()
-        for group in groups:
-            for jid in groups[group]:
-                if jid != self.recipient_jid:
-                    continue
-
-                connections = self.client_roster.presence(jid)
-                for res, pres in connections.items():
-                    return True
+        now = monotonic()
+        if (self._recipient_online is not None
+                and now - self._recipient_online[1] < RECIPIENT_ONLINE_MAX_AGE):
+            return self._recipient_online[0]
 
-        return False
+        is_online = bool(self.client_roster.presence(self.recipient_jid))
+        self._recipient_online = (is_online, now)
+        return is_online
 
     def wait_for_presences(self, pres):
         """
         Track how many roster entries have received presence updates.
         """
-        self.received.add(pres["from"].bare)
-        if len(self.received) >= len(self.client_roster.keys()):
-            self.presences_received.set()
-        else:
-            self.presences_received.clear()
+        bare = pres["from"].bare
+        if bare == self.recipient_jid:
+            self._recipient_online = None
 
+        if bare in self.received:
+            return
 
-class Disconnector(object):
-    def __init__(self, xmpp, course):
-        # type: (CourseXMPP, Course) -> None
-        self.timer = None
-        self.xmpp = xmpp
-        self.course = course
+        self.received.add(bare)
+        self._received_count += 1
+        if (self._expected_presences is not None
+                and self._received_count >= self._expected_presences):
+            self.presences_received.set()
 
-        self.timer = threading.Timer(60, self)  # type: ignore
-        self.timer.start()
 
-    def __call__(self):
-        # type: () -> None
-        # print "EXPIRING XMPP", self.course.pk
-        del _xmpp_connections[self.course.pk]
-        self.xmpp.disconnect(wait=True)
-        _disconnectors.remove(self)
+def _expire_xmpp_connections():
+    # type: () -> Optional[float]
+    """Disconnect and forget connections that have outlived
+    :data:`XMPP_CONNECTION_LIFETIME`. Return the number of seconds until the
+    next one of the remaining connections expires, or *None* if there are
+    none left.
+    """
+    now = monotonic()
+    for course_pk, (xmpp, expiry_time) in list(_xmpp_connections.items()):
+        if expiry_time <= now:
+            del _xmpp_connections[course_pk]
+            xmpp.disconnect(wait=False)
+
+    if not _xmpp_connections:
+        return None
+    return min(expiry_time for _, expiry_time in _xmpp_connections.values()) - now
 
 
 def get_xmpp_connection(course):
+    """Only to be called from the worker thread."""
     try:
-        return _xmpp_connections[course.pk]
+        xmpp, expiry_time = _xmpp_connections[course.pk]
+        return xmpp
     except KeyError:
         xmpp = CourseXMPP(
                 course.course_xmpp_id,
@@ -145,16 +175,74 @@ def get_xmpp_connection(course):
         else:
             raise RuntimeError(_("unable to connect"))
 
-        _xmpp_connections[course.pk] = xmpp
+        _xmpp_connections[course.pk] = (
+                xmpp, monotonic() + XMPP_CONNECTION_LIFETIME)
 
         xmpp.presences_received.wait(5)
-        xmpp.is_recipient_online()
-
-        _disconnectors.append(Disconnector(xmpp, course))
 
         return xmpp
 
 
+def _run_xmpp_worker():
+    # type: () -> None
+    while True:
+        try:
+            # Wake up when the next connection is due to expire, even if no
+            # further messages come in.
+            try:
+                course, body = _xmpp_queue.get(
+                        timeout=_expire_xmpp_connections())
+            except Empty:
+                continue
+
+            try:
+                xmpp = get_xmpp_connection(course)
+                if body is not None:
+                    xmpp.send_message(
+                            mto=course.recipient_xmpp_id,
+                            mbody=body,
+                            mtype="chat")
+            finally:
+                _xmpp_queue.task_done()
+
+        except Exception:
+            print_exc()
+
+
+def xmpp_request(course, body):
+    # type: (Course, Optional[Text]) -> None
+    """Hand *body* for *course* (or, if *None*, just a request to connect) to
+    the worker thread, starting it if it is not running.
+    """
+    global _xmpp_worker
+
+    with _xmpp_worker_lock:
+        if _xmpp_worker is None or not _xmpp_worker.is_alive():
+            _xmpp_worker = threading.Thread(
+                    target=_run_xmpp_worker, name="relate-xmpp", daemon=True)
+            _xmpp_worker.start()
+
+    _xmpp_queue.put_nowait((course, body))
+
+
+def get_recipient_online(course):
+    # type: (Course) -> Optional[bool]
+    """Return whether the recipient for *course* is online, as last seen by
+    the worker's connection, or *None* if that is not known yet. In the latter
+    case, ask the worker to connect. Never waits for the XMPP server.
+    """
+    try:
+        xmpp, expiry_time = _xmpp_connections[course.pk]
+    except KeyError:
+        xmpp_request(course, None)
+        return None
+
+    if not xmpp.presences_received.is_set():
+        return None
+
+    return xmpp.is_recipient_online()
+
+
 @course_view
 def send_instant_message(pctx):
     if not pctx.has_permission(pperm.send_instant_message):
@@ -169,8 +257,11 @@ def send_instant_message(pctx):
 
         return redirect("relate-course_page", pctx.course_identifier)
 
-    xmpp = get_xmpp_connection(pctx.course)
-    if xmpp.is_recipient_online():
+    recipient_online = get_recipient_online(course)
+    if recipient_online is None:
+        form_text = _("Recipient is <span class='label label-default'>"
+                      "Unknown</span>.")
+    elif recipient_online:
         form_text = _("Recipient is <span class='label label-success'>"
                       "Online</span>.")
     else:
@@ -193,13 +284,9 @@ def send_instant_message(pctx):
                 if not course.course_xmpp_password:
                     raise RuntimeError(_("no XMPP password"))
 
-                xmpp.send_message(
-                        mto=course.recipient_xmpp_id,
-                        mbody=form.cleaned_data["message"],
-                        mtype="chat")
+                xmpp_request(course, form.cleaned_data["message"])
 
             except Exception:
-                from traceback import print_exc
                 print_exc()
 
                 messages.add_message(request, messages.ERROR,
@@ -207,7 +294,7 @@ def send_instant_message(pctx):
                           "Sorry."))
             else:
                 messages.add_message(request, messages.SUCCESS,
-                        _("Message sent."))
+                        _("Message queued for sending."))
                 form = InstantMessageForm()
 
     else:
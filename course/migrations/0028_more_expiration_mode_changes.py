@@ -14,11 +14,11 @@ class Migration(migrations.Migration):
         migrations.AlterField(
             model_name='flowaccessexceptionentry',
             name='permission',
-            field=models.CharField(max_length=50, choices=[(b'view', b'View the flow'), (b'view_past', b'Review past attempts'), (b'start_credit', b'Start a for-credit session'), (b'start_no_credit', b'Start a not-for-credit session'), (b'change_answer', b'Change already-graded answer'), (b'see_correctness', b'See whether an answer is correct'), (b'see_correctness_after_completion', b'See whether an answer is correct after completing the flow'), (b'see_answer', b'See the correct answer'), (b'see_answer_after_completion', b'See the correct answer after completing the flow'), (b'set_roll_over_expiration_mode', b"Set the session to 'roll over' expiration mode")]),
+            field=models.CharField(max_length=50, choices=[('view', 'View the flow'), ('view_past', 'Review past attempts'), ('start_credit', 'Start a for-credit session'), ('start_no_credit', 'Start a not-for-credit session'), ('change_answer', 'Change already-graded answer'), ('see_correctness', 'See whether an answer is correct'), ('see_correctness_after_completion', 'See whether an answer is correct after completing the flow'), ('see_answer', 'See the correct answer'), ('see_answer_after_completion', 'See the correct answer after completing the flow'), ('set_roll_over_expiration_mode', "Set the session to 'roll over' expiration mode")]),
         ),
         migrations.AlterField(
             model_name='flowsession',
             name='expiration_mode',
-            field=models.CharField(default='end', max_length=20, null=True, choices=[(b'end', b'End session and grade'), (b'roll_over', b'Roll over to new rules')]),
+            field=models.CharField(default='end', max_length=20, null=True, choices=[('end', 'End session and grade'), ('roll_over', 'Roll over to new rules')]),
         ),
     ]
@@ -23,7 +23,7 @@ class Migration(migrations.Migration):
                 ('expiration', models.DateTimeField(null=True, blank=True)),
                 ('creation_time', models.DateTimeField(default=django.utils.timezone.now, db_index=True)),
                 ('comment', models.TextField(null=True, blank=True)),
-                ('kind', models.CharField(max_length=50, choices=[(b'new_session', b'New Session'), (b'access', b'Session Access'), (b'grading', b'Grading')])),
+                ('kind', models.CharField(max_length=50, choices=[('new_session', 'New Session'), ('access', 'Session Access'), ('grading', 'Grading')])),
                 ('rule', yamlfield.fields.YAMLField()),
                 ('active', models.BooleanField(default=True)),
                 ('creator', models.ForeignKey(to=settings.AUTH_USER_MODEL, null=True, on_delete=models.CASCADE)),
@@ -14,7 +14,7 @@ class Migration(migrations.Migration):
         migrations.AlterField(
             model_name='flowruleexception',
             name='kind',
-            field=models.CharField(max_length=50, choices=[(b'start', b'Session Start'), (b'access', b'Session Access'), (b'grading', b'Grading')]),
+            field=models.CharField(max_length=50, choices=[('start', 'Session Start'), ('access', 'Session Access'), ('grading', 'Grading')]),
             preserve_default=True,
         ),
     ]
@@ -24,6 +24,6 @@ class Migration(migrations.Migration):
         migrations.AlterField(
             model_name='flowaccessexceptionentry',
             name='permission',
-            field=models.CharField(max_length=50, choices=[(b'view', b'View the flow'), (b'submit_answer', b'Submit answers'), (b'end_session', b'End session'), (b'change_answer', b'Change already-graded answer'), (b'see_correctness', b'See whether an answer is correct'), (b'see_answer', b'See the correct answer'), (b'set_roll_over_expiration_mode', b"Set the session to 'roll over' expiration mode")]),
+            field=models.CharField(max_length=50, choices=[('view', 'View the flow'), ('submit_answer', 'Submit answers'), ('end_session', 'End session'), ('change_answer', 'Change already-graded answer'), ('see_correctness', 'See whether an answer is correct'), ('see_answer', 'See the correct answer'), ('set_roll_over_expiration_mode', "Set the session to 'roll over' expiration mode")]),
         ),
     ]
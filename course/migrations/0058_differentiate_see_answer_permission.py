@@ -14,6 +14,6 @@ class Migration(migrations.Migration):
         migrations.AlterField(
             model_name='flowaccessexceptionentry',
             name='permission',
-            field=models.CharField(max_length=50, choices=[(b'view', b'View the flow'), (b'submit_answer', b'Submit answers'), (b'end_session', b'End session'), (b'change_answer', b'Change already-graded answer'), (b'see_correctness', b'See whether an answer is correct'), (b'see_answer_before_submission', b'See the correct answer before answering'), (b'see_answer_after_submission', b'See the correct answer after answering'), (b'set_roll_over_expiration_mode', b"Set the session to 'roll over' expiration mode")]),
+            field=models.CharField(max_length=50, choices=[('view', 'View the flow'), ('submit_answer', 'Submit answers'), ('end_session', 'End session'), ('change_answer', 'Change already-graded answer'), ('see_correctness', 'See whether an answer is correct'), ('see_answer_before_submission', 'See the correct answer before answering'), ('see_answer_after_submission', 'See the correct answer after answering'), ('set_roll_over_expiration_mode', "Set the session to 'roll over' expiration mode")]),
         ),
     ]
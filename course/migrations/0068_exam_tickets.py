@@ -37,7 +37,7 @@ class Migration(migrations.Migration):
                 ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
                 ('creation_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation time')),
                 ('usage_time', models.DateTimeField(null=True, verbose_name='Usage time', blank=True)),
-                ('state', models.CharField(max_length=50, verbose_name='Exam ticket state', choices=[(b'valid', 'Valid'), (b'used', 'Used'), (b'revoked', 'Revoked')])),
+                ('state', models.CharField(max_length=50, verbose_name='Exam ticket state', choices=[('valid', 'Valid'), ('used', 'Used'), ('revoked', 'Revoked')])),
                 ('code', models.CharField(unique=True, max_length=50, db_index=True)),
                 ('creator', models.ForeignKey(verbose_name='Creator', to=settings.AUTH_USER_MODEL, null=True, on_delete=models.CASCADE)),
                 ('exam', models.ForeignKey(verbose_name='Exam', to='course.Exam', on_delete=models.CASCADE)),
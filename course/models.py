@@ -46,7 +46,7 @@ from course.constants import (  # noqa
         flow_session_expiration_mode, FLOW_SESSION_EXPIRATION_MODE_CHOICES,
         grade_aggregation_strategy, GRADE_AGGREGATION_STRATEGY_CHOICES,
         grade_state_change_types, GRADE_STATE_CHANGE_CHOICES,
-        flow_rule_kind, FLOW_RULE_KIND_CHOICES,
+        flow_rule_kind, FLOW_RULE_KIND_CHOICES, FLOW_RULE_KIND_VALUES,
         exam_ticket_states, EXAM_TICKET_STATE_CHOICES,
         participation_permission, PARTICIPATION_PERMISSION_CHOICES,
 
@@ -1260,7 +1260,6 @@ def update_bulk_feedback(page_data, grade, bulk_feedback_json):
                         BULK_FEEDBACK_FILENAME_KEY]
 
                 def delete_bulk_fb_file():
-                    print(f"DELETING {storage_fn_to_delete}!")
                     settings.RELATE_BULK_STORAGE.delete(storage_fn_to_delete)
 
                 transaction.on_commit(delete_bulk_fb_file)
@@ -1475,7 +1474,7 @@ class FlowRuleException(models.Model):
         # type: () -> None
         super(FlowRuleException, self).clean()
 
-        if self.kind not in dict(FLOW_RULE_KIND_CHOICES).keys():
+        if self.kind not in FLOW_RULE_KIND_VALUES:
             raise ValidationError(
                 # Translators: the rule refers to FlowRuleException rule
                 string_concat(_("invalid exception rule kind"), ": ", self.kind))
@@ -24,11 +24,20 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import math
+from functools import lru_cache
+
 import django.forms as forms
 from django import http
+from django.template import loader
+from django.template.context_processors import csrf
+from django.utils.html import format_html, strip_tags, escapejs
+from crispy_forms.utils import render_crispy_form
+from markdown import markdown
 
 from course.validation import validate_struct, ValidationError
 from course.constants import MAX_EXTRA_CREDIT_FACTOR
+from course.content import extract_title_from_markup
 from relate.utils import StyledForm, Struct, string_concat
 from django.forms import ValidationError as FormValidationError
 from django.utils.safestring import mark_safe
@@ -114,6 +123,10 @@ class PageContext(object):
     which is used internally by the flow views.
     """
 
+    __slots__ = (
+            "course", "repo", "commit_sha", "flow_session", "in_sandbox",
+            "page_uri")
+
     def __init__(
             self,
             course: "Course",
@@ -195,7 +208,6 @@ def round_point_count_to_quarters(value, atol=1e-5):
     if abs(value - int(value)) < atol:
         return int(value)
 
-    import math
     _atol = atol * 4
     v = value * 4
     if abs(v - math.floor(v)) < _atol:
@@ -229,7 +241,14 @@ def validate_point_count(correctness, atol=1e-5):
 def get_auto_feedback(correctness):
     # type: (Optional[float]) -> Text
 
-    correctness = validate_point_count(correctness)
+    return _get_auto_feedback_for_point_count(validate_point_count(correctness))
+
+
+# The messages are not translated here, so they depend on nothing but
+# the (rounded) correctness, of which only a handful of values are common.
+@lru_cache(maxsize=256)
+def _get_auto_feedback_for_point_count(correctness):
+    # type: (Optional[float]) -> Text
 
     if correctness is None:
         return str(
@@ -280,6 +299,8 @@ class AnswerFeedback(object):
     .. attribute:: bulk_feedback
     """
 
+    __slots__ = ("correctness", "feedback", "bulk_feedback")
+
     def __init__(self, correctness, feedback=None, bulk_feedback=None):
         # type: (Optional[float], Optional[Text], Optional[Text]) -> None
 
@@ -430,6 +451,12 @@ class PageBase(object):
             self.page_desc = page_desc
             self.is_optional_page = getattr(page_desc, "is_optional_page", False)
 
+            access_rules = getattr(page_desc, "access_rules", None)
+            self._added_permissions = frozenset(
+                    getattr(access_rules, "add_permissions", ()))
+            self._removed_permissions = frozenset(
+                    getattr(access_rules, "remove_permissions", ()))
+
         else:
             from warnings import warn
             warn(_("Not passing page_desc to PageBase.__init__ is deprecated"),
@@ -463,19 +490,8 @@ class PageBase(object):
 
     def get_modified_permissions_for_page(self, permissions):
         # type: (FrozenSet[Text]) -> FrozenSet[Text]
-        rw_permissions = set(permissions)
-
-        if hasattr(self.page_desc, "access_rules"):
-            if hasattr(self.page_desc.access_rules, "add_permissions"):
-                for perm in self.page_desc.access_rules.add_permissions:
-                    rw_permissions.add(perm)
-
-            if hasattr(self.page_desc.access_rules, "remove_permissions"):
-                for perm in self.page_desc.access_rules.remove_permissions:
-                    if perm in rw_permissions:
-                        rw_permissions.remove(perm)
-
-        return frozenset(rw_permissions)
+        return ((frozenset(permissions) | self._added_permissions)
+                - self._removed_permissions)
 
     def make_page_data(self):
         # type: () -> Dict
@@ -624,12 +640,15 @@ class PageBase(object):
             ):
         """Returns an HTML rendering of *form*."""
 
-        from django.template import loader
+        # The template only needs the CSRF token from the request, so skip
+        # running the context processors.
+        context = {"form": form}  # type: Dict
+        if request is not None:
+            context.update(csrf(request))
 
         return loader.render_to_string(
                 "course/crispy-form.html",
-                context={"form": form},
-                request=request)
+                context=context)
 
     # }}}
 
@@ -710,8 +729,6 @@ class PageBase(object):
         """Returns an HTML rendering of *grading_form*."""
 
         # http://bit.ly/2GxzWr1
-        from crispy_forms.utils import render_crispy_form
-        from django.template.context_processors import csrf
         ctx = {}  # type: Dict
         ctx.update(csrf(request))
         return render_crispy_form(grading_form, context=ctx)
@@ -792,6 +809,12 @@ class PageBase(object):
 # {{{ utility base classes
 
 
+@lru_cache(maxsize=1024)
+def _render_title(title):
+    # type: (Text) -> Text
+    return strip_tags(markdown(title))
+
+
 class PageBaseWithTitle(PageBase):
     def __init__(self, vctx, location, page_desc):
         super(PageBaseWithTitle, self).__init__(vctx, location, page_desc)
@@ -811,7 +834,6 @@ class PageBaseWithTitle(PageBase):
                         "markup_body_for_title()")
                         % type(self).__name__)
             else:
-                from course.content import extract_title_from_markup
                 title = extract_title_from_markup(md_body)
 
         if title is None:
@@ -821,9 +843,7 @@ class PageBaseWithTitle(PageBase):
                         _("no title found in body or title attribute"))
                     % (location))
 
-        from markdown import markdown
-        from django.utils.html import strip_tags
-        title = strip_tags(markdown(title))
+        title = _render_title(title)
 
         if not title and vctx is not None:
             vctx.add_warning(location, _("the rendered title is an empty string"))
@@ -910,7 +930,6 @@ class TextInputWithButtons(forms.TextInput):
     def render(self, name, value, attrs=None, renderer=None):
         html = super(TextInputWithButtons, self).render(name, value, attrs,
                                                         renderer)
-        from django.utils.html import format_html, mark_safe, escapejs
         id = attrs["id"]
 
         def make_feedback_func(feedback):
@@ -1050,7 +1069,7 @@ class PageBaseWithHumanTextFeedback(PageBase):
     """
     .. automethod:: human_feedback_point_value
     """
-    grade_data_attrs = ["released", "grade_percent", "feedback_text", "notes"]
+    grade_data_attrs = ("released", "grade_percent", "feedback_text", "notes")
 
     def required_attrs(self):
         return super(PageBaseWithHumanTextFeedback, self).required_attrs() + (
@@ -1068,9 +1087,7 @@ class PageBaseWithHumanTextFeedback(PageBase):
                 page_context, page_data)
 
         if grade_data is not None:
-            form_data = {}
-            for k in self.grade_data_attrs:
-                form_data[k] = grade_data[k]
+            form_data = {k: grade_data[k] for k in self.grade_data_attrs}
 
             return HumanTextFeedbackForm(human_feedback_point_value, form_data)
         else:
@@ -1186,10 +1203,10 @@ class PageBaseWithHumanTextFeedback(PageBase):
                 "form": grading_form,
                 "rubric": markup_to_html(page_context, self.page_desc.rubric)
                 }
+        ctx.update(csrf(request))
 
-        from django.template.loader import render_to_string
-        return render_to_string(
-                "course/human-feedback-form.html", ctx, request)
+        return loader.render_to_string(
+                "course/human-feedback-form.html", ctx)
 
     def grade(
             self,
@@ -1216,27 +1233,27 @@ class PageBaseWithHumanTextFeedback(PageBase):
 
         if (grade_data["grade_percent"] is not None
                 or grade_data["feedback_text"]):
+            feedback_parts = []
             if grade_data["grade_percent"] is not None:
                 correctness = grade_data["grade_percent"]/100
-                feedback_text = "<p>%s</p>" % get_auto_feedback(correctness)
+                feedback_parts += ["<p>", get_auto_feedback(correctness), "</p>"]
 
             else:
                 correctness = None
-                feedback_text = ""
 
             if grade_data["feedback_text"]:
-                feedback_text += (
-                        string_concat(
-                            "<p>",
-                            _("The following feedback was provided"),
-                            ":<p>")
-                        + markup_to_html(
+                feedback_parts += [
+                        "<p>",
+                        str(_("The following feedback was provided")),
+                        ":</p>",
+                        markup_to_html(
                             page_context, grade_data["feedback_text"],
-                            use_jinja=False))
+                            use_jinja=False),
+                        ]
 
             return AnswerFeedback(
                     correctness=correctness,
-                    feedback=feedback_text)
+                    feedback="".join(feedback_parts))
         else:
             return None
 
@@ -24,6 +24,9 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import json
+import random
+
 import django.forms as forms
 from django.utils.safestring import mark_safe
 from django.utils.translation import (
@@ -155,14 +158,30 @@ class ChoiceQuestionBase(PageBaseWithTitle, PageBaseWithValue):
 
         return s
 
+    def _process_choice_string_cached(self, page_context, s):
+        """Like :meth:`process_choice_string`, but remembers the result for
+        the lifetime of the page object, since form, feedback and correct
+        answer of one view often render the same choices.
+        """
+        key = (page_context.commit_sha, s)
+        try:
+            return self._processed_choice_strings[key]
+        except KeyError:
+            result = self._processed_choice_strings[key] = (
+                    self.process_choice_string(page_context, s))
+            return result
+
     def __init__(self, vctx, location, page_desc):
         super(ChoiceQuestionBase, self).__init__(vctx, location, page_desc)
 
+        self._processed_choice_strings = {}
+
         self.correct_choice_count = 0
         self.disregard_choice_count = 0
         self.always_correct_choice_count = 0
 
         self.choices = []
+        unpermuted_indices_by_mode = {mode: [] for mode in ChoiceModes.values}
 
         for choice_idx, choice_desc in enumerate(page_desc.choices):
             choice = ChoiceInfo.parse_from_yaml(
@@ -172,6 +191,7 @@ class ChoiceQuestionBase(PageBaseWithTitle, PageBaseWithValue):
                      "idx": choice_idx+1},
                     choice_desc)
             self.choices.append(choice)
+            unpermuted_indices_by_mode[choice.mode].append(choice_idx)
 
             if choice.mode == ChoiceModes.CORRECT:
                 self.correct_choice_count += 1
@@ -182,6 +202,12 @@ class ChoiceQuestionBase(PageBaseWithTitle, PageBaseWithValue):
             if choice.mode == ChoiceModes.ALWAYS_CORRECT:
                 self.always_correct_choice_count += 1
 
+        # The choices do not change after parsing, so neither do these.
+        self._unpermuted_indices_by_mode = {
+                mode: tuple(indices)
+                for mode, indices in unpermuted_indices_by_mode.items()}
+        self._choice_indices = frozenset(range(len(self.choices)))
+
     def required_attrs(self):
         return super(ChoiceQuestionBase, self).required_attrs() + (
                 ("prompt", "markup"),
@@ -200,26 +226,26 @@ class ChoiceQuestionBase(PageBaseWithTitle, PageBaseWithValue):
         return markup_to_html(page_context, self.page_desc.prompt)
 
     def initialize_page_data(self, page_context):
-        import random
-        perm = list(range(len(self.choices)))
+        n = len(self.choices)
         if getattr(self.page_desc, "shuffle", False):
-            random.shuffle(perm)
+            perm = random.sample(range(n), n)
+        else:
+            perm = list(range(n))
 
         return {"permutation": perm}
 
     def check_page_data(self, page_data):
         if (
                 "permutation" not in page_data
-                or (set(page_data["permutation"])
-                    != set(range(len(self.choices))))):
+                or (frozenset(page_data["permutation"])
+                    != self._choice_indices)):
             from course.page import InvalidPageData
             raise InvalidPageData(gettext(
                 "existing choice permutation not "
                 "suitable for number of choices in question"))
 
     def unpermuted_indices_with_mode(self, mode):
-        return [i for i, choice in enumerate(self.choices)
-                if choice.mode == mode]
+        return self._unpermuted_indices_by_mode[mode]
 
     def unpermuted_correct_indices(self):
         return self.unpermuted_indices_with_mode(ChoiceModes.CORRECT)
@@ -362,7 +388,7 @@ class ChoiceQuestion(ChoiceQuestionBase):
         permutation = page_data["permutation"]
 
         choices = tuple(
-                (i,  self.process_choice_string(
+                (i,  self._process_choice_string_cached(
                     page_context, self.choices[src_i].text))
                 for i, src_i in enumerate(permutation))
 
@@ -389,7 +415,7 @@ class ChoiceQuestion(ChoiceQuestionBase):
         permutation = page_data["permutation"]
         choice = answer_data["choice"]
 
-        if permutation[choice] in self.unpermuted_correct_indices():
+        if self.choices[permutation[choice]].mode == ChoiceModes.CORRECT:
             correctness = 1
         else:
             correctness = 0
@@ -399,7 +425,7 @@ class ChoiceQuestion(ChoiceQuestionBase):
     def correct_answer(self, page_context, page_data, answer_data, grade_data):
         corr_idx = self.unpermuted_correct_indices()[0]
         result = (string_concat(_("A correct answer is"), ": '%s'.")
-                % self.process_choice_string(
+                % self._process_choice_string_cached(
                     page_context,
                     self.choices[corr_idx].text))
 
@@ -415,7 +441,7 @@ class ChoiceQuestion(ChoiceQuestionBase):
         permutation = page_data["permutation"]
         choice = answer_data["choice"]
 
-        return self.process_choice_string(
+        return self._process_choice_string_cached(
                 page_context,
                 self.choices[permutation[choice]].text)
 
@@ -429,7 +455,6 @@ class ChoiceQuestion(ChoiceQuestionBase):
 
         unpermuted_choice = permutation[answer_data["choice"]]
 
-        import json
         return ".json", json.dumps({
                 "choices": [choice.to_json() for choice in self.choices],
                 "permutation": permutation,
@@ -588,7 +613,7 @@ class MultipleChoiceQuestion(ChoiceQuestionBase):
         permutation = page_data["permutation"]
 
         choices = tuple(
-                (i,  self.process_choice_string(
+                (i,  self._process_choice_string_cached(
                     page_context, self.choices[src_i].text))
                 for i, src_i in enumerate(permutation))
 
@@ -664,7 +689,7 @@ class MultipleChoiceQuestion(ChoiceQuestionBase):
         for idx in idx_list:
             answer_html_list.append(
                     "<li>"
-                    + (self.process_choice_string(
+                    + (self._process_choice_string_cached(
                         page_context,
                         self.choices[idx].text))
                     + "</li>"
@@ -713,7 +738,6 @@ class MultipleChoiceQuestion(ChoiceQuestionBase):
         else:
             unpermuted_choices = [permutation[ch] for ch in answer_data["choice"]]
 
-        import json
         return ".json", json.dumps({
                 "choices": [choice.to_json() for choice in self.choices],
                 "permutation": permutation,
@@ -868,7 +892,6 @@ class SurveyChoiceQuestion(PageBaseWithTitle):
         if answer_data is None:
             return None
 
-        import json
         return ".json", json.dumps({
                 "choice": self.page_desc.choices,
                 "0_based_answer": answer_data["choice"],
@@ -24,14 +24,23 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import errno
+import http.client as http_client
+import json
+import socket
+from base64 import b64encode
+from time import time, sleep
+from traceback import format_exc
+
 from course.validation import ValidationError
 import django.forms as forms
 from django.core.exceptions import ObjectDoesNotExist
+from django.template.loader import render_to_string
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 from django.conf import settings
 
-from relate.utils import StyledForm, string_concat
+from relate.utils import StyledForm, string_concat, dict_to_struct
 from course.page.base import (
         PageBaseWithTitle, markup_to_html, PageBaseWithValue,
         PageBaseWithHumanTextFeedback,
@@ -185,11 +194,7 @@ class InvalidPingResponse(RuntimeError):
 
 
 def request_run(run_req, run_timeout, image=None):
-    import json
-    import http.client as http_client
     import docker
-    import socket
-    import errno
     from docker.errors import APIError as DockerAPIError
 
     debug = False
@@ -259,16 +264,19 @@ def request_run(run_req, run_timeout, image=None):
         else:
             port = CODE_QUESTION_CONTAINER_PORT
 
-        from time import time, sleep
         start_time = time()
 
         # {{{ ping until response received
 
-        from traceback import format_exc
+        # Containers usually come up within a few tens of milliseconds, so
+        # back off from a short delay rather than always sleeping 100 ms.
+        retry_delay = 0.005
 
         def check_timeout():
+            nonlocal retry_delay
             if time() - start_time < DOCKER_TIMEOUT:
-                sleep(0.1)
+                sleep(retry_delay)
+                retry_delay = min(2*retry_delay, 0.1)
                 # and retry
             else:
                 return {
@@ -280,14 +288,18 @@ def request_run(run_req, run_timeout, image=None):
 
         while True:
             try:
+                # The runner speaks HTTP/1.0 and closes after each response,
+                # so connections cannot be kept alive; just don't leak them.
                 connection = http_client.HTTPConnection(connect_host_ip, port)
+                try:
+                    connection.request("GET", "/ping")
 
-                connection.request("GET", "/ping")
-
-                response = connection.getresponse()
-                response_data = response.read().decode()
+                    response = connection.getresponse()
+                    response_data = response.read()
+                finally:
+                    connection.close()
 
-                if response_data != "OK":
+                if response_data != b"OK":
                     raise InvalidPingResponse()
 
                 break
@@ -317,19 +329,23 @@ def request_run(run_req, run_timeout, image=None):
 
             headers = {"Content-type": "application/json"}
 
-            json_run_req = json.dumps(run_req).encode("utf-8")
+            json_run_req = json.dumps(
+                    run_req, separators=(",", ":")).encode("utf-8")
 
-            from time import time
             start_time = time()
 
-            debug_print("BEFPOST")
-            connection.request("POST", "/run-python", json_run_req, headers)
-            debug_print("AFTPOST")
-
-            http_response = connection.getresponse()
-            debug_print("GETR")
-            response_data = http_response.read().decode("utf-8")
-            debug_print("READR")
+            try:
+                debug_print("BEFPOST")
+                connection.request("POST", "/run-python", json_run_req, headers)
+                debug_print("AFTPOST")
+
+                http_response = connection.getresponse()
+                debug_print("GETR")
+                # json.loads detects the UTF-8 encoding itself
+                response_data = http_response.read()
+                debug_print("READR")
+            finally:
+                connection.close()
 
             end_time = time()
 
@@ -350,9 +366,12 @@ def request_run(run_req, run_timeout, image=None):
                     }
     finally:
         if container_id is not None:
-            debug_print("-----------BEGIN DOCKER LOGS for %s" % container_id)
-            debug_print(docker_cnx.logs(container_id))
-            debug_print("-----------END DOCKER LOGS for %s" % container_id)
+            if debug:
+                # Only fetch the logs when they will be printed: the call is a
+                # round trip to the Docker daemon.
+                debug_print("-----------BEGIN DOCKER LOGS for %s" % container_id)
+                debug_print(docker_cnx.logs(container_id))
+                debug_print("-----------END DOCKER LOGS for %s" % container_id)
 
             try:
                 docker_cnx.remove_container(container_id, force=True)
@@ -575,6 +594,18 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
         if hasattr(page_desc, "docker_image"):
             self.container_image = page_desc.docker_image
 
+        # The parts of the body context that depend only on page_desc.
+        self._body_static_ctx = {
+                "initial_code": self._initial_code(),
+                "show_setup_code": getattr(page_desc, "show_setup_code", False),
+                "setup_code": getattr(page_desc, "setup_code", ""),
+                "show_test_code": getattr(page_desc, "show_test_code", False),
+                "test_code": getattr(page_desc, "test_code", ""),
+                }
+
+        if hasattr(page_desc, "correct_code"):
+            self._correct_code_html = escape(page_desc.correct_code)
+
         if not getattr(page_desc, "single_submission", False) and vctx is not None:
             is_multi_submit = False
 
@@ -626,20 +657,9 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
         return self.page_desc.prompt
 
     def body(self, page_context, page_data):
-        from django.template.loader import render_to_string
-        return render_to_string(
-                "course/prompt-code-question.html",
-                {
-                    "prompt_html":
-                    markup_to_html(page_context, self.page_desc.prompt),
-                    "initial_code": self._initial_code(),
-                    "show_setup_code": getattr(
-                        self.page_desc, "show_setup_code", False),
-                    "setup_code": getattr(self.page_desc, "setup_code", ""),
-                    "show_test_code": getattr(
-                        self.page_desc, "show_test_code", False),
-                    "test_code": getattr(self.page_desc, "test_code", ""),
-                    })
+        context = dict(self._body_static_ctx)
+        context["prompt_html"] = markup_to_html(page_context, self.page_desc.prompt)
+        return render_to_string("course/prompt-code-question.html", context)
 
     def make_form(self, page_context, page_data,
             answer_data, page_behavior):
@@ -743,35 +763,29 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
 
         run_req = {"compile_only": False, "user_code": user_code}
 
-        def transfer_attr(name):
+        for name in ("setup_code", "names_for_user", "names_from_user"):
             if hasattr(self.page_desc, name):
                 run_req[name] = getattr(self.page_desc, name)
 
-        transfer_attr("setup_code")
-        transfer_attr("names_for_user")
-        transfer_attr("names_from_user")
-
         run_req["test_code"] = self.get_test_code()
 
         if hasattr(self.page_desc, "data_files"):
             run_req["data_files"] = {}
 
-            from course.content import get_repo_blob
+            from course.content import get_repo_blob_data_cached
 
             for data_file in self.page_desc.data_files:
-                from base64 import b64encode
                 run_req["data_files"][data_file] = \
                         b64encode(
-                                get_repo_blob(
+                                get_repo_blob_data_cached(
                                     page_context.repo, data_file,
-                                    page_context.commit_sha).data).decode()
+                                    page_context.commit_sha)).decode()
 
         try:
             response_dict = request_run_with_retries(run_req,
                     run_timeout=self.page_desc.timeout,
                     image=self.container_image)
         except Exception:
-            from traceback import format_exc
             response_dict = {
                     "result": "uncaught_error",
                     "message": "Error connecting to container",
@@ -857,7 +871,6 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
                         msg.send()
 
                     except Exception:
-                        from traceback import format_exc
                         feedback_bits.append(
                             str(string_concat(
                                 "<p>",
@@ -896,7 +909,6 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
                         % _("It looks like you submitted code that is identical to "
                             "the reference solution. This is not allowed."))
 
-        from relate.utils import dict_to_struct
         response = dict_to_struct(response_dict)
 
         bulk_feedback_bits = []
@@ -953,16 +965,14 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
             raise RuntimeError("invalid run result: %s" % response.result)
 
         if hasattr(response, "feedback") and response.feedback:
-            def sanitize(s):
-                import bleach
-                return bleach.clean(s, tags=["p", "pre"])
+            import bleach
             feedback_bits.append("".join([
                 "<p>",
                 _("Here is some feedback on your code"),
                 ":"
                 "<ul>%s</ul></p>"]) %
                         "".join(
-                            "<li>%s</li>" % sanitize(fb_item)
+                            "<li>%s</li>" % bleach.clean(fb_item, tags=["p", "pre"])
                             for fb_item in response.feedback))
         if hasattr(response, "traceback") and response.traceback:
             feedback_bits.append("".join([
@@ -971,7 +981,6 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
                 ":"
                 "<pre>%s</pre></p>"]) % escape(response.traceback))
         if hasattr(response, "exec_host") and response.exec_host != "localhost":
-            import socket
             try:
                 exec_host_name, dummy, dummy = socket.gethostbyaddr(
                         response.exec_host)
@@ -997,24 +1006,19 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
                 ":"
                 "<pre>%s</pre></p>"]) % escape(response.stderr))
         if hasattr(response, "figures") and response.figures:
-            fig_lines = ["".join([
+            fig_title = "".join(["<dt>", _("Figure"), "%d</dt>"])
+            bulk_feedback_bits.append("".join([
                 "<p>",
                 _("Your code produced the following plots"),
-                ":</p>"]),
+                ":</p>"]))
+            bulk_feedback_bits.append("\n".join([
                 '<dl class="result-figure-list">',
-                ]
-
-            for nr, mime_type, b64data in response.figures:
-                if mime_type in ["image/jpeg", "image/png"]:
-                    fig_lines.extend([
-                        "".join([
-                            "<dt>",
-                            _("Figure"), "%d<dt>"]) % nr,
-                        '<dd><img alt="Figure %d" src="data:%s;base64,%s"></dd>'
-                        % (nr, mime_type, b64data)])
-
-            fig_lines.append("</dl>")
-            bulk_feedback_bits.extend(fig_lines)
+                "".join(
+                    '%s\n<dd><img alt="Figure %d" src="data:%s;base64,%s"></dd>\n'
+                    % (fig_title % nr, nr, mime_type, b64data)
+                    for nr, mime_type, b64data in response.figures
+                    if mime_type in ["image/jpeg", "image/png"])
+                + "</dl>"]))
 
         # {{{ html output / sanitization
 
@@ -1046,7 +1050,7 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
             result += ("".join([
                 _("The following code is a valid answer"),
                 ": <pre>%s</pre>"])
-                % escape(self.page_desc.correct_code))
+                % self._correct_code_html)
 
         return result
 
@@ -1056,7 +1060,6 @@ class CodeQuestion(PageBaseWithTitle, PageBaseWithValue):
 
         normalized_answer = self.get_code_from_answer_data(answer_data)
 
-        from django.utils.html import escape
         return "<pre>%s</pre>" % escape(normalized_answer)
 
     def normalized_bytes_answer(self, page_context, page_data, answer_data):
@@ -1483,7 +1486,6 @@ class PythonCodeQuestionWithHumanTextFeedback(
                 and code_feedback.correctness is not None):
             code_feedback_points = code_feedback.correctness*code_points
 
-        from django.template.loader import render_to_string
         feedback = render_to_string(
                 "course/feedback-code-with-human.html",
                 {
@@ -25,9 +25,11 @@ THE SOFTWARE.
 """
 
 
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional
+from django.utils.html import escape
 from django.utils.translation import (
         gettext_lazy as _, gettext)
+from course.constants import MAX_EXTRA_CREDIT_FACTOR
 from course.validation import validate_struct, ValidationError
 import django.forms as forms
 
@@ -36,10 +38,12 @@ from course.page.base import (
         AnswerFeedback, PageBaseWithTitle, PageBaseWithValue, markup_to_html,
         PageBaseWithHumanTextFeedback, PageBaseWithCorrectAnswer,
 
-        get_editor_interaction_mode)
+        get_editor_interaction_mode, validate_point_count)
 
 import re
 import sys
+from functools import lru_cache
+from math import isnan, isinf
 
 CORRECT_ANSWER_PATTERN = string_concat(_("A correct answer is"), ": '%s'.")  # noqa
 
@@ -239,7 +243,6 @@ class TextAnswerMatcher(object):
         self.value = matcher_desc.value
 
         if hasattr(matcher_desc, "correctness"):
-            from course.constants import MAX_EXTRA_CREDIT_FACTOR
             if not 0 <= matcher_desc.correctness <= MAX_EXTRA_CREDIT_FACTOR:
                 raise ValidationError(
                         string_concat(
@@ -285,8 +288,16 @@ class CaseSensitivePlainMatcher(TextAnswerMatcher):
     def __init__(self, vctx, location, matcher_desc):
         super().__init__(vctx, location, matcher_desc)
 
+        # normalized once here rather than on every grade() call
+        self.normalized_value = self.normalize(self.value)
+
+    @staticmethod
+    def normalize(s):
+        return multiple_to_single_spaces(s)
+
     def grade(self, s):
-        if multiple_to_single_spaces(self.value) == multiple_to_single_spaces(s):
+        # An answer identical to the value normalizes identically, too.
+        if s == self.value or self.normalized_value == self.normalize(s):
             return AnswerFeedback(self.correctness, self.feedback)
         else:
             return AnswerFeedback(0)
@@ -302,12 +313,41 @@ class PlainMatcher(CaseSensitivePlainMatcher):
     type = "plain"
     is_case_sensitive = False
 
-    def grade(self, s):
-        if (multiple_to_single_spaces(self.value.lower())
-                == multiple_to_single_spaces(s.lower())):
-            return AnswerFeedback(self.correctness, self.feedback)
-        else:
-            return AnswerFeedback(0)
+    @staticmethod
+    def normalize(s):
+        return multiple_to_single_spaces(s.lower())
+
+
+def regex_has_nested_unbounded_repeat(pattern, flags=0):
+    """Return *True* if *pattern* repeats, without bound, something that
+    itself contains an unbounded repeat, e.g. ``(a+)+`` or ``(\\w+\\s?)*``.
+    Such patterns can backtrack catastrophically on answers that
+    almost match.
+    """
+    try:
+        from re import _parser as sre_parse  # type: ignore  # Python 3.11+
+    except ImportError:
+        import sre_parse
+
+    def walk(items, in_unbounded_repeat):
+        for op, av in items:
+            if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                __, max_count, subpattern = av
+                is_unbounded = max_count == sre_parse.MAXREPEAT
+                if is_unbounded and in_unbounded_repeat:
+                    return True
+                if walk(subpattern, in_unbounded_repeat or is_unbounded):
+                    return True
+            elif op == sre_parse.SUBPATTERN:
+                if walk(av[-1], in_unbounded_repeat):
+                    return True
+            elif op == sre_parse.BRANCH:
+                if any(walk(branch, in_unbounded_repeat) for branch in av[1]):
+                    return True
+
+        return False
+
+    return walk(sre_parse.parse(pattern, flags), False)
 
 
 class RegexMatcher(TextAnswerMatcher):
@@ -371,9 +411,27 @@ class RegexMatcher(TextAnswerMatcher):
                         "err_type": tp.__name__,
                         "err_str": str(e)})
 
+        if (vctx is not None
+                and regex_has_nested_unbounded_repeat(self.value, re_flags)):
+            vctx.add_warning(location,
+                    _("regex '%s' repeats a part that itself contains "
+                      "a repetition. Matching such patterns can take "
+                      "very long for some answers.") % self.value)
+
+        # A case-sensitive pattern without metacharacters matches exactly
+        # the answers starting with it, no regex engine needed.
+        if not re_flags & re.IGNORECASE and re.escape(self.value) == self.value:
+            self._literal_prefix = self.value  # type: Optional[str]
+        else:
+            self._literal_prefix = None
+
     def grade(self, s):
-        match = self.regex.match(s)
-        if match is not None:
+        if self._literal_prefix is not None:
+            is_match = s.startswith(self._literal_prefix)
+        else:
+            is_match = self.regex.match(s) is not None
+
+        if is_match:
             return AnswerFeedback(self.correctness, self.feedback)
         else:
             return AnswerFeedback(0)
@@ -394,6 +452,66 @@ class CaseSensitiveRegexMatcher(RegexMatcher):
                 "instead."))
 
 
+_INLINE_RE_FLAGS = [
+        (re.IGNORECASE, "i"),
+        (re.MULTILINE, "m"),
+        (re.DOTALL, "s"),
+        (re.VERBOSE, "x"),
+        (re.ASCII, "a"),
+        ]
+
+
+# Global inline flags such as "(?i)" would apply to all alternatives once
+# combined. This may also match where no flags are set, e.g. in a character
+# class, which only costs the combination.
+_GLOBAL_INLINE_FLAGS_RE = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def combine_regex_matchers(matchers):
+    """Fuse the patterns of several :class:`RegexMatcher` instances into a
+    single alternation, so that an answer can be checked against all of them
+    with one call into the regex engine.
+
+    The alternatives are ordered by decreasing correctness (and otherwise keep
+    the order of *matchers*), so the alternative that matches is the matcher
+    :meth:`TextQuestion.grade` would pick among *matchers*.
+
+    :returns: a tuple ``(regex, ordered_matchers)``, where group *i* of
+        *regex* corresponds to ``ordered_matchers[i-1]``, or *None* if the
+        patterns cannot be combined, e.g. because they use groups or global
+        inline flags of their own.
+    """
+    if len(matchers) < 2 or any(
+            matcher.regex.groups
+            or _GLOBAL_INLINE_FLAGS_RE.search(matcher.regex.pattern)
+            for matcher in matchers):
+        return None
+
+    ordered_matchers = sorted(matchers, key=lambda matcher: -matcher.correctness)
+
+    alternatives = []
+    for matcher in ordered_matchers:
+        pattern = matcher.regex.pattern
+        if matcher.regex.flags & re.VERBOSE:
+            # keep a trailing comment from swallowing the closing parens
+            pattern += "\n"
+
+        flags = "".join(
+                letter for flag, letter in _INLINE_RE_FLAGS
+                if matcher.regex.flags & flag)
+        if flags:
+            pattern = "(?%s:%s)" % (flags, pattern)
+
+        alternatives.append("(%s)" % pattern)
+
+    try:
+        regex = re.compile("|".join(alternatives))
+    except re.error:
+        return None
+
+    return regex, ordered_matchers
+
+
 def parse_sympy(s):
     from pymbolic import parse
     from pymbolic.interop.sympy import PymbolicToSympyMapper
@@ -402,6 +520,11 @@ def parse_sympy(s):
     return PymbolicToSympyMapper()(parse(s))
 
 
+# Parsed expressions are immutable, and the same submitted answers come up
+# over and over, across participants and between validate() and grade().
+_parse_answer_sympy = lru_cache(maxsize=2048)(parse_sympy)
+
+
 class SymbolicExpressionMatcher(TextAnswerMatcher):
     type = "sym_expr"
     is_case_sensitive = True
@@ -440,7 +563,7 @@ class SymbolicExpressionMatcher(TextAnswerMatcher):
 
     def validate(self, s):
         try:
-            parse_sympy(s)
+            _parse_answer_sympy(s)
         except Exception:
             tp, e, _ = sys.exc_info()
             raise forms.ValidationError("%(err_type)s: %(err_str)s"
@@ -448,17 +571,23 @@ class SymbolicExpressionMatcher(TextAnswerMatcher):
 
     def grade(self, s):
         try:
-            answer_sym = parse_sympy(s)
+            answer_sym = _parse_answer_sympy(s)
         except Exception:
             return AnswerFeedback(0)
 
-        from sympy import simplify
+        # simplify() is slow. Most correct answers are already structurally
+        # equal to the reference, or become so once expanded.
+        from sympy import expand, simplify
         try:
-            simp_result = simplify(answer_sym - self.value_sym)
+            if answer_sym == self.value_sym:
+                is_equal = True
+            else:
+                diff = answer_sym - self.value_sym
+                is_equal = expand(diff) == 0 or simplify(diff) == 0
         except Exception:
             return AnswerFeedback(0)
 
-        if simp_result == 0:
+        if is_equal:
             return AnswerFeedback(self.correctness, self.feedback)
         else:
             return AnswerFeedback(0)
@@ -542,7 +671,7 @@ class FloatMatcher(TextAnswerMatcher):
                             _("does not provide a valid float literal"))
                         % location)
         else:
-            if matcher_desc.value == 0:
+            if matcher_desc.value == 0 and vctx is not None:
                 vctx.add_warning(location,
                          _("Float match for 'value' zero should have atol--"
                            "otherwise it will match any number"))
@@ -556,6 +685,16 @@ class FloatMatcher(TextAnswerMatcher):
                     _("Float match should have either rtol or atol--"
                         "otherwise it will match any number"))
 
+        # Largest accepted deviation from 'value', satisfying both
+        # tolerances. (rtol with a zero 'value' is rejected above.)
+        abs_tol = float("inf")
+        if hasattr(matcher_desc, "atol"):
+            abs_tol = matcher_desc.atol
+        if hasattr(matcher_desc, "rtol"):
+            abs_tol = min(abs_tol, matcher_desc.rtol * abs(matcher_desc.value))
+        self._abs_tol = abs_tol
+        self._value = matcher_desc.value
+
     def validate(self, s):
         try:
             float_or_sympy_evalf(s)
@@ -574,23 +713,16 @@ class FloatMatcher(TextAnswerMatcher):
         good_afb = AnswerFeedback(self.correctness, self.feedback)
         bad_afb = AnswerFeedback(0)
 
-        from math import isnan, isinf
-        if isinf(self.matcher_desc.value):
+        value = self._value
+        if isinf(value):
             return good_afb if isinf(answer_float) else bad_afb
-        if isnan(self.matcher_desc.value):
+        if isnan(value):
             return good_afb if isnan(answer_float) else bad_afb
         if isinf(answer_float) or isnan(answer_float):
             return bad_afb
 
-        if hasattr(self.matcher_desc, "atol"):
-            if (abs(answer_float - self.matcher_desc.value)
-                    > self.matcher_desc.atol):
-                return bad_afb
-        if hasattr(self.matcher_desc, "rtol"):
-            if (abs(answer_float - self.matcher_desc.value)
-                    / abs(self.matcher_desc.value)
-                    > self.matcher_desc.rtol):
-                return bad_afb
+        if abs(answer_float - value) > self._abs_tol:
+            return bad_afb
 
         return good_afb
 
@@ -610,14 +742,43 @@ TEXT_ANSWER_MATCHER_CLASSES = [
         FloatMatcher,
         ]
 
+_MATCHER_CLASS_BY_TYPE = {
+        matcher_class.type: matcher_class
+        for matcher_class in TEXT_ANSWER_MATCHER_CLASSES}
+
+
+_MATCHER_TYPE_CHARS = frozenset(
+        "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_:.")
+
+
+def _split_matcher_string(s):
+    # type: (str) -> Optional[Tuple[str, str]]
+
+    """Split a ``<type>value`` matcher string into *(type, value)*, or return
+    *None* if *s* does not have that form. *value* may not span lines.
+    """
+    if not s.startswith("<"):
+        return None
 
-MATCHER_RE = re.compile(r"^\<([a-zA-Z0-9_:.]+)\>(.*)$")
+    end = s.find(">")
+    matcher_type = s[1:end]
+    if end <= 1 or not _MATCHER_TYPE_CHARS.issuperset(matcher_type):
+        return None
+
+    value = s[end+1:]
+    if value.endswith("\n"):
+        value = value[:-1]
+    if "\n" in value:
+        return None
+
+    return matcher_type, value
 
 
 def get_matcher_class(location, matcher_type):
-    for matcher_class in TEXT_ANSWER_MATCHER_CLASSES:
-        if matcher_class.type == matcher_type:
-            return matcher_class
+    try:
+        return _MATCHER_CLASS_BY_TYPE[matcher_type]
+    except (KeyError, TypeError):
+        pass
 
     raise ValidationError(
             string_concat(
@@ -630,12 +791,13 @@ def get_matcher_class(location, matcher_type):
 
 def parse_matcher(vctx, location, matcher_desc):
     if isinstance(matcher_desc, str):
-        match = MATCHER_RE.match(matcher_desc)
+        split = _split_matcher_string(matcher_desc)
 
-        if match is not None:
+        if split is not None:
+            matcher_type, value = split
             matcher_desc = Struct({
-                "type": match.group(1),
-                "value": match.group(2),
+                "type": matcher_type,
+                "value": value,
                 })
         else:
             raise ValidationError(
@@ -778,7 +940,6 @@ class TextQuestionBase(PageBaseWithTitle):
         if not self._is_case_sensitive():
             normalized_answer = normalized_answer.lower()
 
-        from django.utils.html import escape
         return escape(normalized_answer)
 
     def normalized_bytes_answer(self, page_context, page_data, answer_data):
@@ -1007,8 +1168,14 @@ class TextQuestion(TextQuestionBase, PageBaseWithValue):
                     answer)
                 for i, answer in enumerate(page_desc.answers)]
 
-        if not any(matcher.correct_answer_text() is not None
-                for matcher in self.matchers):
+        # The matchers do not change after construction, so neither does
+        # what correct_answer() and normalized_answer() derive from them.
+        self._correct_answer_text = next(
+                (text for text in (
+                    matcher.correct_answer_text() for matcher in self.matchers)
+                    if text is not None),
+                None)
+        if self._correct_answer_text is None:
             raise ValidationError(
                     string_concat(
                         "%s: ",
@@ -1016,6 +1183,29 @@ class TextQuestion(TextQuestionBase, PageBaseWithValue):
                         "correct answer"))
                     % location)
 
+        self._any_matcher_case_sensitive = any(
+                matcher.is_case_sensitive for matcher in self.matchers)
+
+        combined = combine_regex_matchers(
+                [matcher for matcher in self.matchers
+                    if isinstance(matcher, RegexMatcher)])
+        if combined is not None:
+            self.combined_regex, self.combined_regex_matchers = combined
+        else:
+            self.combined_regex = None
+            self.combined_regex_matchers = []
+
+        # Highest correctness any of self.matchers[i:] can award. Since a
+        # later matcher only wins with strictly higher correctness, grade()
+        # can stop early once that is reached, e.g. before sympy is invoked.
+        max_correctness_from = []
+        max_correctness = float("-inf")
+        for matcher in reversed(self.matchers):
+            max_correctness = max(
+                    max_correctness, validate_point_count(matcher.correctness))
+            max_correctness_from.append(max_correctness)
+        self._max_correctness_from = tuple(reversed(max_correctness_from))
+
     def required_attrs(self):
         return super(TextQuestion, self).required_attrs() + (
                 ("answers", list),
@@ -1036,17 +1226,41 @@ class TextQuestion(TextQuestionBase, PageBaseWithValue):
 
         answer = answer_data["answer"]
 
+        # Of the regex matchers that were combined, only the best one that
+        # matches can decide the grade; the others count as not matching.
+        # The combined regex only runs once grading gets to one of them.
+        best_regex_matcher = None
+        combined_regex_matched = False
+
         # Must start with 'None' to allow matcher to set feedback for zero
         # correctness.
         afb = None
 
-        for matcher in self.matchers:
+        for matcher, max_correctness in zip(
+                self.matchers, self._max_correctness_from):
+            if afb is not None and afb.correctness >= max_correctness:
+                break
+
             try:
                 matcher.validate(answer)
             except forms.ValidationError:
                 continue
 
-            matcher_afb = matcher.grade(answer)
+            if matcher in self.combined_regex_matchers:
+                if not combined_regex_matched:
+                    match = self.combined_regex.match(answer)
+                    if match is not None:
+                        best_regex_matcher = (
+                                self.combined_regex_matchers[match.lastindex - 1])
+                    combined_regex_matched = True
+
+                if matcher is best_regex_matcher:
+                    matcher_afb = AnswerFeedback(
+                            matcher.correctness, matcher.feedback)
+                else:
+                    matcher_afb = AnswerFeedback(0)
+            else:
+                matcher_afb = matcher.grade(answer)
             if matcher_afb.correctness is not None:
                 if afb is None:
                     afb = matcher_afb
@@ -1061,12 +1275,7 @@ class TextQuestion(TextQuestionBase, PageBaseWithValue):
     def correct_answer(self, page_context, page_data, answer_data, grade_data):
         # FIXME: Could use 'best' match to answer
 
-        unspec_correct_answer_text = None
-        for matcher in self.matchers:  # pragma: no branch
-            unspec_correct_answer_text = matcher.correct_answer_text()
-            if unspec_correct_answer_text is not None:
-                break
-
+        unspec_correct_answer_text = self._correct_answer_text
         assert unspec_correct_answer_text
 
         result = CORRECT_ANSWER_PATTERN % unspec_correct_answer_text
@@ -1077,7 +1286,7 @@ class TextQuestion(TextQuestionBase, PageBaseWithValue):
         return result
 
     def _is_case_sensitive(self):
-        return any(matcher.is_case_sensitive for matcher in self.matchers)
+        return self._any_matcher_case_sensitive
 
 # }}}
 
@@ -25,7 +25,15 @@ THE SOFTWARE.
 """
 
 
+from base64 import b64decode, b64encode
+from mimetypes import guess_extension
+
 import django.forms as forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _, gettext_lazy
 
 from course.page.base import (
@@ -67,7 +75,6 @@ class FileUploadForm(StyledForm):
 
     def clean_uploaded_file(self):
         uploaded_file = self.cleaned_data["uploaded_file"]
-        from django.template.defaultfilters import filesizeformat
 
         if uploaded_file.size > self.max_file_size:
             raise forms.ValidationError(
@@ -77,7 +84,10 @@ class FileUploadForm(StyledForm):
                         "uploadedsize": filesizeformat(uploaded_file.size)})
 
         if self.mime_types is not None and self.mime_types == ["application/pdf"]:
-            if uploaded_file.read()[:4] != b"%PDF":
+            # Only the magic number is needed, not the whole upload.
+            header = uploaded_file.read(4)
+            uploaded_file.seek(0)
+            if header != b"%PDF":
                 raise forms.ValidationError(_("Uploaded file is not a PDF."))
 
         return uploaded_file
@@ -158,16 +168,16 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
     def __init__(self, vctx, location, page_desc):
         super(FileUploadQuestion, self).__init__(vctx, location, page_desc)
 
-        if not (set(page_desc.mime_types) <= set(self.ALLOWED_MIME_TYPES)):
+        unknown_mime_types = [
+                mime_type for mime_type in page_desc.mime_types
+                if mime_type not in self.ALLOWED_MIME_TYPES]
+        if unknown_mime_types:
             raise ValidationError(
                 string_concat(
                     location, ": ",
                     _("unrecognized mime types"),
                     " '%(presenttype)s'")
-                % {
-                    "presenttype": ", ".join(
-                        set(page_desc.mime_types)
-                        - set(self.ALLOWED_MIME_TYPES))})
+                % {"presenttype": ", ".join(unknown_mime_types)})
 
         if page_desc.maximum_megabytes <= 0:
             raise ValidationError(
@@ -204,7 +214,6 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
         return markup_to_html(page_context, self.page_desc.prompt)
 
     def get_submission_filename_pattern(self, page_context, mime_type):
-        from mimetypes import guess_extension
         if mime_type is not None:
             ext = guess_extension(mime_type)
         else:
@@ -230,8 +239,6 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
         if len(self.page_desc.mime_types) == 1:
             mime_type, = self.page_desc.mime_types
 
-        from django.conf import settings
-
         uploaded_file.seek(0)
         saved_name = settings.RELATE_BULK_STORAGE.save(
                 self.get_submission_filename_pattern(page_context, mime_type),
@@ -247,13 +254,11 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
         mime_type = answer_data.get("mime_type", "application/octet-stream")
 
         if "storage_filename" in answer_data:
-            from django.conf import settings
             with settings.RELATE_BULK_STORAGE.open(
                     answer_data["storage_filename"]) as inf:
                 return inf.read(), mime_type
 
         elif "base64_data" in answer_data:
-            from base64 import b64decode
             return b64decode(answer_data["base64_data"]), mime_type
 
         else:
@@ -275,19 +280,20 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
     def form_to_html(self, request, page_context, form, answer_data):
         ctx = {"form": form}
         if answer_data is not None:
-            from base64 import b64encode
             subm_data, subm_mime = self.get_content_from_answer_data(answer_data)
             ctx["mime_type"] = subm_mime
-            ctx["data_url"] = "data:%s;base64,%s" % (
-                subm_mime,
-                b64encode(subm_data).decode())
+            # The base64 payload contains no HTML-special characters, so only
+            # the MIME type needs escaping. This spares the template a full
+            # autoescape pass over what may be many megabytes of data.
+            ctx["data_url"] = mark_safe("data:%s;base64,%s" % (
+                escape(subm_mime),
+                b64encode(subm_data).decode("ascii")))
 
-        from django.template.loader import render_to_string
         return render_to_string(
                 "course/file-upload-form.html", ctx, request)
 
     def answer_data(self, page_context, page_data, form, files_data):
-        uploaded_file = files_data["uploaded_file"]
+        uploaded_file = form.cleaned_data["uploaded_file"]
         return self.file_to_answer_data(page_context, uploaded_file,
                 mime_type=uploaded_file.content_type)
 
@@ -297,7 +303,6 @@ class FileUploadQuestion(PageBaseWithTitle, PageBaseWithValue,
 
         subm_data, subm_mime = self.get_content_from_answer_data(answer_data)
 
-        from mimetypes import guess_extension
         ext = guess_extension(subm_mime)
 
         if ext is None:
@@ -24,14 +24,14 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.db import transaction
 from django.dispatch import receiver
 
 from accounts.models import User
 from course.models import (
         Course, Participation, participation_status,
-        ParticipationPreapproval,
+        ParticipationPreapproval, ParticipationRole, GradingOpportunity,
         )
 
 from typing import List, Union, Text, Optional, Tuple, Any  # noqa
@@ -111,4 +111,57 @@ def may_preapprove_role(course, user):
 
 # }}}
 
+
+# {{{ Clear cached grade book data when its inputs change
+
+def clear_gradebook_cache_now_and_on_commit(course_pks):
+    # type: (List[int]) -> None
+
+    from course.grades import clear_gradebook_cache
+
+    def clear():
+        # type: () -> None
+        for course_pk in course_pks:
+            clear_gradebook_cache(course_pk)
+
+    # Clear now, for reads later in this transaction, and again on commit, in
+    # case a concurrent request refilled the cache from the old data.
+    clear()
+    transaction.on_commit(clear)
+
+
+@receiver(post_save, sender=GradingOpportunity)
+@receiver(post_delete, sender=GradingOpportunity)
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def clear_gradebook_cache_on_change(sender, instance, **kwargs):
+    # type: (Any, Union[GradingOpportunity, Participation], **Any) -> None
+
+    clear_gradebook_cache_now_and_on_commit([instance.course_id])
+
+
+@receiver(m2m_changed, sender=Participation.roles.through)
+def clear_gradebook_cache_on_roles_change(sender, instance, action, **kwargs):
+    # type: (Any, Union[Participation, ParticipationRole], Text, **Any) -> None
+
+    # Either side of the relation belongs to a single course.
+    if action.startswith("post_"):
+        clear_gradebook_cache_now_and_on_commit([instance.course_id])
+
+
+@receiver(post_save, sender=User)
+def clear_gradebook_cache_on_user_change(sender, instance, **kwargs):
+    # type: (Any, User, **Any) -> None
+
+    # Don't bother on every sign-in.
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+
+    clear_gradebook_cache_now_and_on_commit(list(
+        Participation.objects.filter(user=instance)
+        .values_list("course_id", flat=True)))
+
+# }}}
+
 # vim: foldmethod=marker
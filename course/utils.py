@@ -588,12 +588,17 @@ class CoursePageContext(object):
         from course.views import check_course_state
         check_course_state(self.course, self.participation)
 
-        self.repo = get_course_repo(self.course)
+        # Opened on first use: many views (and the commit SHA lookup, unless
+        # a preview is active) never need the repository.
+        self._repo = None  # type: Optional[Repo_ish]
+
+        needs_repo = (self.participation is not None
+                and bool(self.participation.preview_git_commit_sha))
 
         try:
             sha = get_course_commit_sha(
                 self.course, self.participation,
-                repo=self.repo,
+                repo=self.repo if needs_repo else None,
                 raise_on_nonexistent_preview_commit=True)
         except CourseCommitSHADoesNotExist as e:
             from django.contrib import messages
@@ -603,6 +608,18 @@ class CoursePageContext(object):
 
         self.course_commit_sha = sha
 
+    @property
+    def repo(self):
+        # type: () -> Repo_ish
+        if self._repo is None:
+            self._repo = get_course_repo(self.course)
+        return self._repo
+
+    def close_repo(self):
+        # type: () -> None
+        if self._repo is not None:
+            self._repo.close()
+
     def role_identifiers(self):
         # type: () -> List[Text]
         if self._role_identifiers_cache is not None:
@@ -662,7 +679,7 @@ class CoursePageContext(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._is_in_context_manager = False
         self._set_course_lang(action="deactivate")
-        self.repo.close()
+        self.close_repo()
 
 
 class FlowContext(object):
@@ -785,7 +802,7 @@ def course_view(f):
     def wrapper(request, course_identifier, *args, **kwargs):
         with CoursePageContext(request, course_identifier) as pctx:
             response = f(pctx, *args, **kwargs)
-            pctx.repo.close()
+            pctx.close_repo()
             return response
 
     from functools import update_wrapper
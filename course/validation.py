@@ -27,14 +27,16 @@ THE SOFTWARE.
 import re
 import datetime
 import sys
+from functools import lru_cache
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.html import escape
 from django.utils.translation import (
         gettext_lazy as _, gettext)
 from course.constants import (
-        FLOW_SESSION_EXPIRATION_MODE_CHOICES,
+        FLOW_SESSION_EXPIRATION_MODE_VALUES,
         ATTRIBUTES_FILENAME, DEFAULT_ACCESS_KINDS,
+        FLOW_ID_REGEX, STATICPAGE_PATH_REGEX,
         participation_permission as pperm)
 
 from course.content import get_repo_blob
@@ -70,6 +72,8 @@ class ValidationError(RuntimeError):
 
 
 ID_RE = re.compile(r"^[\w]+$")
+FLOW_ID_RE = re.compile("^" + FLOW_ID_REGEX + "$")
+STATICPAGE_PATH_RE = re.compile("^" + STATICPAGE_PATH_REGEX + "$")
 
 
 def validate_identifier(vctx, location, s, warning_only=False):
@@ -154,6 +158,45 @@ def validate_participationtag(vctx, location, participationtag):
                 })
 
 
+@lru_cache(maxsize=None)
+def _get_attr_validation_plan(required_attrs, allowed_attrs):
+    # type: (Tuple, Tuple) -> Tuple[Tuple[Tuple[Text, Any, bool, bool], ...], frozenset]  # noqa
+
+    """Normalize a pair of attribute validation lists (as tuples) into a tuple
+    of *(name, allowed_types, is_markup, required)* entries and the
+    :class:`frozenset` of all names they mention. The same lists are
+    passed for every page, rule and chunk of a given kind, so this is
+    only computed once per kind.
+    """
+
+    plan = []
+    known_attrs = set()
+    for required, attr_list in [
+            (True, required_attrs),
+            (False, allowed_attrs),
+            ]:
+        for attr_rec in attr_list:
+            if isinstance(attr_rec, tuple):
+                attr, allowed_types = attr_rec
+            else:
+                attr = attr_rec
+                allowed_types = None
+
+            # Only the first mention of an attribute is checked.
+            if attr in known_attrs:
+                continue
+            known_attrs.add(attr)
+
+            is_markup = False
+            if allowed_types == "markup":
+                allowed_types = str
+                is_markup = True
+
+            plan.append((attr, allowed_types, is_markup, required))
+
+    return tuple(plan), frozenset(known_attrs)
+
+
 def validate_struct(
         vctx,  # type: ValidationContext
         location,  # type: Text
@@ -177,54 +220,44 @@ def validate_struct(
         raise ValidationError(
                 "%s: not a key-value map" % location)
 
-    present_attrs = set(name for name in dir(obj) if not name.startswith("_"))
+    plan, known_attrs = _get_attr_validation_plan(
+            tuple(required_attrs), tuple(allowed_attrs))
 
-    for required, attr_list in [
-            (True, required_attrs),
-            (False, allowed_attrs),
-            ]:
-        for attr_rec in attr_list:
-            if isinstance(attr_rec, tuple):
-                attr, allowed_types = attr_rec
-            else:
-                attr = attr_rec
-                allowed_types = None
+    # Struct keeps its fields in the instance __dict__, so there is no need
+    # to walk the class hierarchy with dir().
+    present_attrs = set(name for name in vars(obj) if not name.startswith("_"))
 
-            if attr not in present_attrs:
-                if required:
-                    raise ValidationError(
-                            string_concat("%(location)s: ",
-                                _("attribute '%(attr)s' missing"))
-                            % {"location": location, "attr": attr})
-            else:
-                present_attrs.remove(attr)
-                val = getattr(obj, attr)
-
-                is_markup = False
-                if allowed_types == "markup":
-                    allowed_types = str
-                    is_markup = True
-
-                if not isinstance(val, allowed_types):
-                    raise ValidationError(
-                            string_concat("%(location)s: ",
-                                _("attribute '%(attr)s' has "
-                                    "wrong type: got '%(name)s', "
-                                    "expected '%(allowed)s'"))
-                            % {
-                                "location": location,
-                                "attr": attr,
-                                "name": type(val).__name__,
-                                "allowed": escape(str(allowed_types))})
-
-                if is_markup:
-                    validate_markup(vctx, "%s: attribute %s" % (location, attr), val)
-
-    if present_attrs:
+    for attr, allowed_types, is_markup, required in plan:
+        if attr not in present_attrs:
+            if required:
+                raise ValidationError(
+                        string_concat("%(location)s: ",
+                            _("attribute '%(attr)s' missing"))
+                        % {"location": location, "attr": attr})
+        else:
+            val = getattr(obj, attr)
+
+            if not isinstance(val, allowed_types):
+                raise ValidationError(
+                        string_concat("%(location)s: ",
+                            _("attribute '%(attr)s' has "
+                                "wrong type: got '%(name)s', "
+                                "expected '%(allowed)s'"))
+                        % {
+                            "location": location,
+                            "attr": attr,
+                            "name": type(val).__name__,
+                            "allowed": escape(str(allowed_types))})
+
+            if is_markup:
+                validate_markup(vctx, "%s: attribute %s" % (location, attr), val)
+
+    extraneous_attrs = present_attrs - known_attrs
+    if extraneous_attrs:
         raise ValidationError(
                 string_concat("%(location)s: ",
                     _("extraneous attribute(s) '%(attr)s'"))
-                % {"location": location, "attr": ",".join(present_attrs)})
+                % {"location": location, "attr": ",".join(extraneous_attrs)})
 
 
 datespec_types = (datetime.date, str, datetime.datetime)
@@ -525,6 +558,8 @@ def validate_flow_group(vctx, location, grp):
                     _("group '%(group_id)s': group is empty"))
                 % {"location": location, "group_id": grp.id})
 
+    page_ids = set()
+
     for i, page_desc in enumerate(grp.pages):
         validate_flow_page(
                 vctx,
@@ -532,6 +567,19 @@ def validate_flow_group(vctx, location, grp):
                 % (location, i+1, getattr(page_desc, "id", None)),
                 page_desc)
 
+        # {{{ check page id uniqueness
+
+        if page_desc.id in page_ids:
+            raise ValidationError(
+                    string_concat(
+                        "%(location)s: ",
+                        _("page id '%(page_desc_id)s' not unique"))
+                    % {"location": location, "page_desc_id": page_desc.id})
+
+        page_ids.add(page_desc.id)
+
+        # }}}
+
     if hasattr(grp, "max_page_count"):
         if grp.max_page_count <= 0:
             raise ValidationError(
@@ -548,22 +596,6 @@ def validate_flow_group(vctx, location, grp):
                   "max_page_count in a future version. set "
                   "'shuffle: False' to match current behavior."))
 
-    # {{{ check page id uniqueness
-
-    page_ids = set()
-
-    for page_desc in grp.pages:
-        if page_desc.id in page_ids:
-            raise ValidationError(
-                    string_concat(
-                        "%(location)s: ",
-                        _("page id '%(page_desc_id)s' not unique"))
-                    % {"location": location, "page_desc_id": page_desc.id})
-
-        page_ids.add(page_desc.id)
-
-    # }}}
-
     validate_identifier(vctx, location, grp.id)
 
 
@@ -650,9 +682,8 @@ def validate_session_start_rule(vctx, location, nrule, tags):
                     % {"location": location, "tag": nrule.tag_session})
 
     if hasattr(nrule, "default_expiration_mode"):
-        from course.constants import FLOW_SESSION_EXPIRATION_MODE_CHOICES
-        if nrule.default_expiration_mode not in dict(
-                FLOW_SESSION_EXPIRATION_MODE_CHOICES):
+        if (nrule.default_expiration_mode
+                not in FLOW_SESSION_EXPIRATION_MODE_VALUES):
             raise ValidationError(
                     string_concat("%(location)s: ",
                         _("invalid default expiration mode '%(expiremode)s'"))
@@ -725,8 +756,8 @@ def validate_session_access_rule(vctx, location, arule, tags):
                     % {"location": location, "tag": arule.if_has_tag})
 
     if hasattr(arule, "if_expiration_mode"):
-        if arule.if_expiration_mode not in dict(
-                FLOW_SESSION_EXPIRATION_MODE_CHOICES):
+        if (arule.if_expiration_mode
+                not in FLOW_SESSION_EXPIRATION_MODE_VALUES):
             raise ValidationError(
                     string_concat("%(location)s: ",
                         _("invalid expiration mode '%(expiremode)s'"))
@@ -997,7 +1028,7 @@ def validate_flow_rules(vctx, location, rules):
 def validate_flow_permission(vctx, location, permission):
     # type: (ValidationContext, Text, Text) -> None
 
-    from course.constants import FLOW_PERMISSION_CHOICES
+    from course.constants import FLOW_PERMISSION_VALUES
     if permission == "modify":
         vctx.add_warning(location, _("Uses deprecated 'modify' permission--"
                 "replace by 'submit_answer' and 'end_session'"))
@@ -1009,7 +1040,7 @@ def validate_flow_permission(vctx, location, permission):
                 "replace by 'see_answer_after_submission'"))
         return
 
-    if permission not in dict(FLOW_PERMISSION_CHOICES):
+    if permission not in FLOW_PERMISSION_VALUES:
         raise ValidationError(
                 string_concat("%(location)s: ",
                     _("invalid flow permission '%(permission)s'"))
@@ -1063,12 +1094,11 @@ def validate_flow_desc(vctx, location, flow_desc):
         assert not hasattr(flow_desc, "pages")
         assert hasattr(flow_desc, "groups")
 
-    # {{{ check for non-emptiness
+    # {{{ check for non-emptiness and group id uniqueness
 
-    flow_has_page = False
-    for i, grp in enumerate(flow_desc.groups):
-        group_has_page = False
+    group_ids = set()
 
+    for i, grp in enumerate(flow_desc.groups):
         if not isinstance(grp.pages, list):
             raise ValidationError(
                     string_concat(
@@ -1080,11 +1110,7 @@ def validate_flow_desc(vctx, location, flow_desc):
                         "group_index": i+1,
                         "group_id": grp.id})
 
-        for page in grp.pages:
-            group_has_page = flow_has_page = True
-            break
-
-        if not group_has_page:
+        if not grp.pages:
             raise ValidationError(
                     string_concat(
                         "%(location)s, ",
@@ -1095,17 +1121,6 @@ def validate_flow_desc(vctx, location, flow_desc):
                         "group_index": i+1,
                         "group_id": grp.id})
 
-    if not flow_has_page:
-        raise ValidationError(_("%s: no pages found")
-                % location)
-
-    # }}}
-
-    # {{{ check group id uniqueness
-
-    group_ids = set()
-
-    for grp in flow_desc.groups:
         if grp.id in group_ids:
             raise ValidationError(
                     string_concat("%(location)s: ",
@@ -1114,6 +1129,10 @@ def validate_flow_desc(vctx, location, flow_desc):
 
         group_ids.add(grp.id)
 
+    if not flow_desc.groups:
+        raise ValidationError(_("%s: no pages found")
+                % location)
+
     # }}}
 
     for i, grp in enumerate(flow_desc.groups):
@@ -1398,8 +1417,7 @@ def check_for_page_type_changes(vctx, location, course, flow_id, flow_desc):
 def validate_flow_id(vctx, location, flow_id):
     # type: (ValidationContext, Text, Text) -> None
 
-    from course.constants import FLOW_ID_REGEX
-    match = re.match("^" + FLOW_ID_REGEX + "$", flow_id)
+    match = FLOW_ID_RE.match(flow_id)
     if match is None:
         raise ValidationError(
             string_concat("%s: ",
@@ -1413,8 +1431,7 @@ def validate_flow_id(vctx, location, flow_id):
 def validate_static_page_name(vctx, location, page_name):
     # type: (ValidationContext, Text, Text) -> None
 
-    from course.constants import STATICPAGE_PATH_REGEX
-    match = re.match("^" + STATICPAGE_PATH_REGEX + "$", page_name)
+    match = STATICPAGE_PATH_RE.match(page_name)
     if match is None:
         raise ValidationError(
             string_concat("%s: ",
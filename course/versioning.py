@@ -140,6 +140,39 @@ def get_dulwich_client_and_remote_path_from_course(course):
 
 # {{{ new course setup
 
+def fetch_and_validate_new_course_repo(new_course, repo):
+    # type: (Course, Repo) -> bytes
+    """Fetch the content of *new_course*'s remote into the freshly
+    initialized *repo*, validate it, and return the SHA of its ``HEAD``.
+    """
+
+    client, remote_path = \
+        get_dulwich_client_and_remote_path_from_course(new_course)
+
+    fetch_pack_result = client.fetch(remote_path, repo)
+    if not fetch_pack_result.refs:
+        raise RuntimeError(_("No refs found in remote repository"
+                " (i.e. no master branch, no HEAD). "
+                "This looks very much like a blank repository. "
+                "Please create course.yml in the remote "
+                "repository before creating your course."))
+
+    transfer_remote_refs(repo, fetch_pack_result)
+    new_sha = repo[b"HEAD"] = fetch_pack_result.refs[b"HEAD"]
+
+    vrepo = repo
+    if new_course.course_root_path:
+        from course.content import SubdirRepoWrapper
+        vrepo = SubdirRepoWrapper(vrepo, new_course.course_root_path)
+
+    from course.validation import validate_course_content
+    validate_course_content(  # type: ignore
+            vrepo, new_course.course_file,
+            new_course.events_file, new_sha)
+
+    return new_sha
+
+
 class CourseCreationForm(StyledModelForm):
     class Meta:
         model = Course
@@ -200,33 +233,8 @@ def set_up_new_course(request):
                     with transaction.atomic():
                         repo = Repo.init(repo_path)
 
-                        client, remote_path = \
-                            get_dulwich_client_and_remote_path_from_course(
-                                    new_course)
-
-                        fetch_pack_result = client.fetch(remote_path, repo)
-                        if not fetch_pack_result.refs:
-                            raise RuntimeError(_("No refs found in remote repository"
-                                    " (i.e. no master branch, no HEAD). "
-                                    "This looks very much like a blank repository. "
-                                    "Please create course.yml in the remote "
-                                    "repository before creating your course."))
-
-                        transfer_remote_refs(repo, fetch_pack_result)
-                        new_sha = repo[b"HEAD"] = fetch_pack_result.refs[b"HEAD"]
-
-                        vrepo = repo
-                        if new_course.course_root_path:
-                            from course.content import SubdirRepoWrapper
-                            vrepo = SubdirRepoWrapper(
-                                    vrepo, new_course.course_root_path)
-
-                        from course.validation import validate_course_content
-                        validate_course_content(  # type: ignore
-                                vrepo, new_course.course_file,
-                                new_course.events_file, new_sha)
-
-                        del vrepo
+                        new_sha = fetch_and_validate_new_course_repo(
+                                new_course, repo)
 
                         new_course.active_git_commit_sha = new_sha.decode()
                         new_course.save()
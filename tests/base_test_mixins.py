@@ -20,6 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import atexit
 import sys
 import re
 import tempfile
@@ -27,18 +28,27 @@ import os
 import shutil
 import hashlib
 import datetime
+import json
+from decimal import Decimal
 from types import MethodType
-from functools import partial
+from functools import lru_cache, partial, reduce
+from operator import or_
 
 import memcache
 
 from collections import OrderedDict
 from copy import deepcopy
 from django.test import Client, override_settings, RequestFactory
-from django.urls import reverse, resolve
+from django.urls import (
+    reverse, resolve, get_resolver, get_script_prefix, get_urlconf)
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+from dulwich.repo import Repo
 
 from course.flow import GradeInfo
 from course.models import (
@@ -48,12 +58,22 @@ from course.constants import (
     participation_status, user_status,
     grade_aggregation_strategy as g_strategy,
     flow_permission as fperm)
-from course.content import get_course_repo_path, get_repo_blob
+from course.content import (
+    get_course_commit_sha, get_course_repo, get_course_repo_path, get_flow_desc,
+    get_repo_blob)
+from course.grades import clear_gradebook_cache
+from course.utils import (
+    CoursePageContext, FlowContext, FlowSessionAccessRule,
+    FlowSessionGradingRule, FlowSessionStartRule, get_session_start_rule)
+from course.versioning import fetch_and_validate_new_course_repo
+from relate.utils import dict_to_struct, force_remove_path, struct_to_dict
 
 from tests.constants import (
     QUIZ_FLOW_ID, TEST_PAGE_TUPLE, FAKED_YAML_PATH, COMMIT_SHA_MAP)
 from tests.utils import mock
 
+User = get_user_model()
+
 # {{{ data
 
 CORRECTNESS_ATOL = 1e-05
@@ -186,6 +206,82 @@ def git_source_url_to_cache_keys(url):
     )
 
 
+# Pristine copies of the course repos fetched during this test run, so that
+# each git source is fetched only once per run, with or without memcached.
+_course_repo_cache = {}
+_course_repo_cache_dir = None
+
+
+def cache_course_repo(course):
+    """Keep a copy of the freshly fetched repo of *course* for
+    :func:`get_cached_course_repo`.
+    """
+    global _course_repo_cache_dir
+    if _course_repo_cache_dir is None:
+        _course_repo_cache_dir = tempfile.mkdtemp(prefix="relate_test_repos_")
+        atexit.register(shutil.rmtree, _course_repo_cache_dir, ignore_errors=True)
+
+    commit_sha = course.active_git_commit_sha
+    cached_repo_path = os.path.join(_course_repo_cache_dir, commit_sha)
+    if not os.path.isdir(cached_repo_path):
+        shutil.copytree(get_course_repo_path(course), cached_repo_path)
+    _course_repo_cache[course.git_source] = (cached_repo_path, commit_sha)
+
+    url_cache_key, commit_sha_cach_key = (
+        git_source_url_to_cache_keys(course.git_source))
+    try:
+        mc.set_multi({url_cache_key: cached_repo_path,
+                      commit_sha_cach_key: commit_sha},
+                     time=120000
+                     )
+    except Exception:
+        pass
+
+
+def get_cached_course_repo(git_source):
+    """Return ``(repo_path, commit_sha)`` of a cached copy of the repo
+    at *git_source*, or *None* if there is none.
+    """
+    repo_cache_key, commit_sha_cach_key = (
+        git_source_url_to_cache_keys(git_source))
+    candidates = [_course_repo_cache.get(git_source, (None, None))]
+    try:
+        candidates.insert(0, (mc.get(repo_cache_key), mc.get(commit_sha_cach_key)))
+    except Exception:
+        pass
+
+    for repo_path, commit_sha in candidates:
+        if repo_path and commit_sha and os.path.isdir(repo_path):
+            return repo_path, commit_sha
+    return None
+
+
+@lru_cache(maxsize=None)
+def make_test_password(password):
+    """:func:`~django.contrib.auth.hashers.make_password`, memoized: the
+    default hasher is slow by design, and the fixtures only use a handful of
+    passwords.
+    """
+    return make_password(password)
+
+
+@lru_cache(maxsize=None)
+def _cached_reverse(resolver, script_prefix, viewname, args, kwargs):
+    return reverse(viewname, args=args, kwargs=kwargs and dict(kwargs))
+
+
+def cached_reverse(viewname, args=None, kwargs=None):
+    """Like :func:`django.urls.reverse`, but memoized, for the URLs the test
+    helpers build over and over. The current resolver is part of the cache
+    key, so :func:`tests.utils.reload_urlconf` and ``ROOT_URLCONF``
+    overrides are honored.
+    """
+    return _cached_reverse(
+        get_resolver(get_urlconf()), get_script_prefix(), viewname,
+        tuple(args) if args else None,
+        tuple(sorted(kwargs.items())) if kwargs else None)
+
+
 class CourseCreateFailure(Exception):
     pass
 
@@ -400,7 +496,6 @@ class ResponseContextMixin:
                           HTTP_X_REQUESTED_WITH="XMLHttpRequest")
 
     def get_select2_response_data(self, response, key="results"):
-        import json
         return json.loads(response.content.decode("utf-8"))[key]
 
 
@@ -428,8 +523,12 @@ class SuperuserCreateMixin(ResponseContextMixin):
 
     @classmethod
     def create_superuser(cls):
-        return get_user_model().objects.create_superuser(
-            **cls.create_superuser_kwargs)
+        superuser = User.objects.create_superuser(
+            **dict(cls.create_superuser_kwargs, password=None))
+        superuser.password = make_test_password(
+            cls.create_superuser_kwargs["password"])
+        superuser.save(update_fields=["password"])
+        return superuser
 
     @classmethod
     def get_sign_up_view_url(cls):
@@ -590,10 +689,9 @@ class SuperuserCreateMixin(ResponseContextMixin):
     def force_remove_all_course_dir(cls):
         # This is only necessary for courses which are created test wise,
         # not class wise.
-        from relate.utils import force_remove_path
-        from course.content import get_course_repo_path
-        for c in Course.objects.all():
-            force_remove_path(get_course_repo_path(c))
+        # same as get_course_repo_path(), without loading whole courses
+        for identifier in Course.objects.values_list("identifier", flat=True):
+            force_remove_path(os.path.join(settings.GIT_ROOT, identifier))
 
     def assertSessionPretendFacilitiesContains(self, session, expected_facilities):  # noqa
         pretended = session.get("relate_pretend_facilities", None)
@@ -647,24 +745,26 @@ class SuperuserCreateMixin(ResponseContextMixin):
 
 def get_flow_page_ordinal_from_page_id(flow_session_id, page_id,
                                        with_group_id=False):
-    flow_page_data = FlowPageData.objects.get(
-        flow_session__id=flow_session_id,
+    page_ordinal, group_id = FlowPageData.objects.values_list(
+        "page_ordinal", "group_id").get(
+        flow_session_id=flow_session_id,
         page_id=page_id
     )
     if with_group_id:
-        return flow_page_data.page_ordinal, flow_page_data.group_id
-    return flow_page_data.page_ordinal
+        return page_ordinal, group_id
+    return page_ordinal
 
 
 def get_flow_page_id_from_page_ordinal(flow_session_id, page_ordinal,
                                        with_group_id=False):
-    flow_page_data = FlowPageData.objects.get(
-        flow_session__id=flow_session_id,
+    page_id, group_id = FlowPageData.objects.values_list(
+        "page_id", "group_id").get(
+        flow_session_id=flow_session_id,
         page_ordinal=page_ordinal
     )
     if with_group_id:
-        return flow_page_data.page_id, flow_page_data.group_id
-    return flow_page_data.page_id
+        return page_id, group_id
+    return page_id
 
 # }}}
 
@@ -716,89 +816,101 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
     def setUpTestData(cls):  # noqa
         super().setUpTestData()
 
-        client = Client()
-        client.force_login(cls.superuser)
-        cls.default_flow_params = None
-        cls.n_courses = 0
-        if cls.courses_attributes_extra_list is not None:
-            if (len(cls.courses_attributes_extra_list)
-                    != len(cls.courses_setup_list)):
-                raise ValueError(
-                    "'courses_attributes_extra_list' must has equal length "
-                    "with courses")
-
-        for i, course_setup in enumerate(cls.courses_setup_list):
-            if "course" not in course_setup:
-                continue
-
-            cls.n_courses += 1
-            course_identifier = course_setup["course"]["identifier"]
-            course_setup_kwargs = course_setup["course"]
-            if cls.courses_attributes_extra_list:
-                extra_attrs = cls.courses_attributes_extra_list[i]
-                assert isinstance(extra_attrs, dict)
-                course_setup_kwargs.update(extra_attrs)
-
-            cls.create_course(client, course_setup_kwargs)
-
-            course = Course.objects.get(identifier=course_identifier)
-            if "participations" in course_setup:
-                for participation in course_setup["participations"]:
-                    create_user_kwargs = participation.get("user")
-                    if not create_user_kwargs:
-                        continue
-                    role_identifier = participation.get("role_identifier")
-                    if not role_identifier:
-                        continue
-                    cls.create_participation(
-                        course=course,
-                        user_or_create_user_kwargs=create_user_kwargs,
-                        role_identifier=role_identifier,
-                        status=participation.get("status",
-                                                 participation_status.active)
-                    )
-
-            # Remove superuser from participation for further test
-            # such as impersonate in auth module
-            try:
-                superuser_participations = (
-                    Participation.objects.filter(user=cls.superuser))
-                for sp in superuser_participations:
-                    Participation.delete(sp)
-            except Participation.DoesNotExist:
-                pass
+        with transaction.atomic():
+            # create_course() falls back to post_create_course(), which logs in
+            # the superuser itself, only when the view path is needed.
+            client = Client()
+            cls.default_flow_params = None
+            cls.n_courses = 0
+            if cls.courses_attributes_extra_list is not None:
+                if (len(cls.courses_attributes_extra_list)
+                        != len(cls.courses_setup_list)):
+                    raise ValueError(
+                        "'courses_attributes_extra_list' must has equal length "
+                        "with courses")
+
+            for i, course_setup in enumerate(cls.courses_setup_list):
+                if "course" not in course_setup:
+                    continue
+
+                cls.n_courses += 1
+                course_identifier = course_setup["course"]["identifier"]
+                course_setup_kwargs = course_setup["course"]
+                if cls.courses_attributes_extra_list:
+                    extra_attrs = cls.courses_attributes_extra_list[i]
+                    assert isinstance(extra_attrs, dict)
+                    # don't update in place: the setup lists are shared
+                    # module-level data
+                    course_setup_kwargs = dict(course_setup_kwargs, **extra_attrs)
+
+                cls.create_course(client, course_setup_kwargs)
+
+                course = Course.objects.get(identifier=course_identifier)
+                if "participations" in course_setup:
+                    cls.create_participations(
+                        course, course_setup["participations"])
+
+                # Remove superuser from participation for further test
+                # such as impersonate in auth module
+                Participation.objects.filter(user=cls.superuser).delete()
+
+                cls.non_participation_users = User.objects.none()
+                if cls.none_participation_user_create_kwarg_list:
+                    cls.non_participation_users = cls.create_users(
+                        cls.none_participation_user_create_kwarg_list)
+
+            cls.course_qset = Course.objects.all()
+            cls.courses = list(cls.course_qset.order_by("pk"))
 
-            cls.non_participation_users = get_user_model().objects.none()
-            if cls.none_participation_user_create_kwarg_list:
-                pks = []
-                for create_user_kwargs in (
-                        cls.none_participation_user_create_kwarg_list):
-                    user = cls.create_user(create_user_kwargs)
-                    pks.append(user.pk)
-                cls.non_participation_users = (
-                    get_user_model().objects.filter(pk__in=pks))
+    def setUp(self):  # noqa
+        super().setUp()
 
-        cls.course_qset = Course.objects.all()
+        # Nothing commits in a TestCase, so nothing clears the grade book
+        # data a previous test cached before its changes were rolled back.
+        for course in self.courses:
+            clear_gradebook_cache(course.pk)
 
     @classmethod
     def create_user(cls, create_user_kwargs):
-        user, created = get_user_model().objects.get_or_create(
-            email__iexact=create_user_kwargs["email"], defaults=create_user_kwargs)
-        if created:
-            try:
-                # TODO: why pop failed here?
-                password = create_user_kwargs["password"]
-            except Exception:
-                raise
-            user.set_password(password)
-            user.save()
+        user, created = User.objects.get_or_create(
+            email__iexact=create_user_kwargs["email"],
+            defaults=dict(
+                create_user_kwargs,
+                password=make_test_password(create_user_kwargs["password"])))
         return user
 
+    @classmethod
+    def create_users(cls, create_user_kwargs_list):
+        """Like :meth:`create_user`, but for a list of users, inserting the
+        missing ones with a single query. Returns a queryset of all of them.
+        """
+        email_query = reduce(or_, (
+            Q(email__iexact=create_user_kwargs["email"])
+            for create_user_kwargs in create_user_kwargs_list))
+        existing_emails = {
+            email.lower() for email in
+            User.objects.filter(email_query).values_list(
+                "email", flat=True)}
+
+        new_users = []
+        for create_user_kwargs in create_user_kwargs_list:
+            email = create_user_kwargs["email"].lower()
+            if email in existing_emails:
+                continue
+            existing_emails.add(email)
+            new_users.append(User(**dict(
+                create_user_kwargs,
+                password=make_test_password(create_user_kwargs["password"]))))
+
+        User.objects.bulk_create(new_users)
+
+        return User.objects.filter(email_query)
+
     @classmethod
     def create_participation(
             cls, course, user_or_create_user_kwargs,
             role_identifier=None, status=None):
-        if isinstance(user_or_create_user_kwargs, get_user_model()):
+        if isinstance(user_or_create_user_kwargs, User):
             user = user_or_create_user_kwargs
         else:
             assert isinstance(user_or_create_user_kwargs, dict)
@@ -818,6 +930,62 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
             participation.roles.set(role)
         return participation
 
+    @classmethod
+    def create_participations(cls, course, participation_setups):
+        """Create the participations described by *participation_setups* (in
+        the format of the ``participations`` entries of
+        :attr:`courses_setup_list`) in *course*, using a constant number of
+        queries. Entries lacking a user or a role are skipped, and users
+        already participating in *course* are left alone, as with
+        :meth:`create_participation`.
+        """
+        participation_setups = [
+            setup for setup in participation_setups
+            if setup.get("user") and setup.get("role_identifier")]
+        if not participation_setups:
+            return
+
+        users_by_email = {
+            user.email.lower(): user
+            for user in cls.create_users(
+                [setup["user"] for setup in participation_setups])}
+        participating_user_ids = set(
+            Participation.objects.filter(
+                course=course,
+                user__in=list(users_by_email.values()))
+            .values_list("user_id", flat=True))
+
+        new_participations = []
+        new_role_identifiers = {}
+        for setup in participation_setups:
+            user = users_by_email[setup["user"]["email"].lower()]
+            if user.pk in participating_user_ids:
+                continue
+            participating_user_ids.add(user.pk)
+            new_participations.append(Participation(
+                user=user, course=course,
+                status=setup.get("status", participation_status.active)))
+            new_role_identifiers[user.pk] = setup["role_identifier"]
+
+        Participation.objects.bulk_create(new_participations)
+
+        roles_by_identifier = {
+            role.identifier: role
+            for role in ParticipationRole.objects.filter(course=course)}
+        role_through = Participation.roles.through
+        role_through.objects.bulk_create([
+            role_through(
+                participation_id=participation_id,
+                participationrole_id=roles_by_identifier[
+                    new_role_identifiers[user_id]].pk)
+            for participation_id, user_id in Participation.objects.filter(
+                course=course, user_id__in=list(new_role_identifiers))
+            .values_list("pk", "user_id")
+            if new_role_identifiers[user_id] in roles_by_identifier])
+
+        # bulk_create does not send the post_save that clears this.
+        clear_gradebook_cache(course.pk)
+
     @classmethod_with_client
     def post_create_course(cls, client, create_course_kwargs, *,  # noqa: N805
             raise_error=True, login_superuser=True):
@@ -862,34 +1030,51 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
                         create_course_kwargs["trusted_for_markup"]
                 last_course.save()
 
-            url_cache_key, commit_sha_cach_key = (
-                git_source_url_to_cache_keys(last_course.git_source))
-            mc.set_multi({url_cache_key: get_course_repo_path(last_course),
-                          commit_sha_cach_key: last_course.active_git_commit_sha},
-                         time=120000
-                         )
+            cache_course_repo(last_course)
         return resp
 
-    @classmethod_with_client
-    def create_course(cls, client, create_course_kwargs, *,  # noqa: N805
-            raise_error=True):
-        has_cached_repo = False
-        repo_cache_key, commit_sha_cach_key = (
-            git_source_url_to_cache_keys(create_course_kwargs["git_source"]))
+    @classmethod
+    def fetch_create_course(cls, create_course_kwargs, *, raise_error=True):
+        """Create the course the way :func:`course.versioning.set_up_new_course`
+        does, minus the request handling and the creator's participation.
+        """
+
+        new_course = Course(**create_course_kwargs)
+        repo_path = get_course_repo_path(new_course)
+        os.makedirs(repo_path)
+        repo = Repo.init(repo_path)
         try:
-            exist_course_repo_path = mc.get(repo_cache_key)
-            exist_commit_sha = mc.get(commit_sha_cach_key)
-            if os.path.isdir(exist_course_repo_path):
-                has_cached_repo = bool(exist_course_repo_path and exist_commit_sha)
-            else:
-                has_cached_repo = False
-        except Exception:
-            pass
+            with override_settings(**cls.override_settings_at_post_create_course):
+                new_sha = fetch_and_validate_new_course_repo(new_course, repo)
+        except Exception as e:
+            repo.close()
+            force_remove_path(repo_path)
+            if raise_error:
+                raise CourseCreateFailure(
+                    "{}: {}".format(type(e).__name__, str(e)))
+            return None
+        repo.close()
+
+        new_course.active_git_commit_sha = new_sha.decode()
+        new_course.save()
+
+        cache_course_repo(new_course)
+        return new_course
 
-        if not has_cached_repo:
-            # fall back to post create
+    @classmethod_with_client
+    def create_course(cls, client, create_course_kwargs, *,  # noqa: N805
+            raise_error=True, use_view=False):
+        if use_view:
             return cls.post_create_course(
                     client, create_course_kwargs, raise_error=raise_error)
+
+        cached_repo = get_cached_course_repo(create_course_kwargs["git_source"])
+        if cached_repo is None:
+            # fall back to fetching the repo, without the view's
+            # request/response overhead
+            return cls.fetch_create_course(
+                    create_course_kwargs, raise_error=raise_error)
+        exist_course_repo_path, exist_commit_sha = cached_repo
         existing_course_count = Course.objects.count()
         new_course_repo_path = os.path.join(settings.GIT_ROOT,
                                         create_course_kwargs["identifier"])
@@ -903,7 +1088,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
     def get_course_view_url(cls, view_name, course_identifier=None):
         course_identifier = (
             course_identifier or cls.get_default_course_identifier())
-        return reverse(view_name, args=[course_identifier])
+        return cached_reverse(view_name, args=[course_identifier])
 
     @classmethod
     def get_course_calender_url(cls, course_identifier=None):
@@ -912,7 +1097,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
 
     @classmethod
     def get_set_up_new_course_url(cls):
-        return reverse("relate-set_up_new_course")
+        return cached_reverse("relate-set_up_new_course")
 
     @classmethod_with_client
     def get_set_up_new_course(cls, client):  # noqa: N805
@@ -949,7 +1134,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
 
         kwargs = {"course_identifier": course_identifier,
                   "flow_session_id": flow_session_id}
-        return reverse("relate-finish_flow_session_view", kwargs=kwargs)
+        return cached_reverse("relate-finish_flow_session_view", kwargs=kwargs)
 
     @classmethod
     def _get_grades_url(cls, args=None, kwargs=None):
@@ -1182,8 +1367,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
     def get_logged_in_user(cls, client):  # noqa: N805
         try:
             logged_in_user_id = client.session["_auth_user_id"]
-            from django.contrib.auth import get_user_model
-            logged_in_user = get_user_model().objects.get(
+            logged_in_user = User.objects.get(
                 pk=int(logged_in_user_id))
         except KeyError:
             logged_in_user = None
@@ -1251,7 +1435,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
         course_identifier = course_identifier or cls.get_default_course_identifier()
         kwargs = {"course_identifier": course_identifier,
                   "flow_id": flow_id}
-        return reverse("relate-view_start_flow", kwargs=kwargs)
+        return cached_reverse("relate-view_start_flow", kwargs=kwargs)
 
     @classmethod_with_client
     def start_flow(cls, client, flow_id, *,  # noqa: N805
@@ -1262,7 +1446,9 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
         create many related objects in db, if those objects are changed in
         individual test, other tests followed might fail.
         """
-        existing_session_count = FlowSession.objects.all().count()
+        last_session_pk = (
+            FlowSession.objects.order_by("-pk")
+            .values_list("pk", flat=True).first()) or 0
         if ignore_cool_down:
             cool_down_seconds = 0
         else:
@@ -1274,15 +1460,51 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
 
         if assume_success:
             assert resp.status_code == 302, resp.content
-            new_session_count = FlowSession.objects.all().count()
-            assert new_session_count == existing_session_count + 1
             _, _, params = resolve(resp.url)
+            # redirected to a new session, not to a resumed one
+            assert int(params["flow_session_id"]) > last_session_pk
             del params["page_ordinal"]
             cls.default_flow_params = params
             cls.update_default_flow_session_id(course_identifier)
 
         return resp
 
+    @classmethod
+    def start_flow_without_view(cls, flow_id, participation, *,
+            now_datetime=None):
+        """Like :meth:`start_flow` with *assume_success*, but start the session
+        for *participation* by calling :func:`course.flow.start_flow` directly
+        instead of posting to the start view. The view's cool-down, facility
+        and exam ticket handling is skipped, so tests of the view itself
+        should use :meth:`start_flow`.
+        """
+        from course.flow import start_flow
+
+        course = participation.course
+        if now_datetime is None:
+            now_datetime = now()
+
+        repo = get_course_repo(course)
+        try:
+            fctx = FlowContext(repo, course, flow_id, participation=participation)
+            session_start_rule = get_session_start_rule(
+                course, participation, flow_id, fctx.flow_desc, now_datetime)
+            assert session_start_rule.may_start_new_session
+            session = start_flow(
+                repo, course, participation, user=participation.user,
+                flow_id=flow_id, flow_desc=fctx.flow_desc,
+                session_start_rule=session_start_rule,
+                now_datetime=now_datetime)
+        finally:
+            repo.close()
+
+        # as resolved from the URL that start_flow is redirected to
+        cls.default_flow_params = {
+            "course_identifier": course.identifier,
+            "flow_session_id": str(session.id)}
+        cls.update_default_flow_session_id(course.identifier)
+        return session
+
     @classmethod_with_client
     def end_flow(cls, client, *,  # noqa: N805
             course_identifier=None, flow_session_id=None,
@@ -1349,7 +1571,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
             flow_session_id=None):
         page_params = cls.get_page_params(
             course_identifier, flow_session_id, page_ordinal)
-        return reverse(viewname, kwargs=page_params)
+        return cached_reverse(viewname, kwargs=page_params)
 
     @classmethod
     def get_page_view_url_by_page_id(
@@ -1429,7 +1651,7 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
             "flow_session_id": flow_session_id,
             "page_ordinal": page_ordinal
         }
-        page_url = reverse("relate-view_flow_page", kwargs=page_params)
+        page_url = cached_reverse("relate-view_flow_page", kwargs=page_params)
         resp = client.post(page_url, submit_data)
         return resp
 
@@ -1483,9 +1705,8 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
         if flow_session_id is None:
             flow_params = cls.get_flow_params(course_identifier, flow_session_id)
             flow_session_id = flow_params["flow_session_id"]
-        flow_session = FlowSession.objects.get(id=flow_session_id)
+        flow_session = FlowSession.objects.only("points").get(id=flow_session_id)
         if expected_score is not None:
-            from decimal import Decimal
             assert flow_session.points == Decimal(str(expected_score)), (
                 "The flow session got '%s' in stead of '%s'"
                 % (str(flow_session.points), str(Decimal(str(expected_score))))
@@ -1535,7 +1756,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
         resp = self.get_page_submit_history_by_ordinal(
             page_ordinal, course_identifier=course_identifier,
             flow_session_id=flow_session_id)
-        import json
         result = json.loads(resp.content.decode())["result"]
         self.assertEqual(len(result), expected_count)
 
@@ -1558,7 +1778,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
                 page_ordinal, course_identifier=course_identifier,
                 flow_session_id=flow_session_id)
 
-        import json
         result = json.loads(resp.content.decode())["result"]
         self.assertEqual(len(result), expected_count)
 
@@ -1571,7 +1790,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
     @classmethod
     def get_course_commit_sha(cls, participation, course=None):
         course = course or cls.get_default_course()
-        from course.content import get_course_commit_sha
         return get_course_commit_sha(course, participation)
 
     @classmethod_with_client
@@ -1752,7 +1970,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
                 mock_get_nrule.return_value = (
                     self.get_hacked_session_start_rule())
         """
-        from course.utils import FlowSessionStartRule
         defaults = deepcopy(self.default_session_start_rule)
         defaults.update(kwargs)
         return FlowSessionStartRule(**defaults)
@@ -1774,7 +1991,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
                     self.get_hacked_session_access_rule(
                         permissions=[fperm.end_session]))
         """
-        from course.utils import FlowSessionAccessRule
         defaults = deepcopy(self.default_session_access_rule)
         defaults.update(kwargs)
         return FlowSessionAccessRule(**defaults)
@@ -1805,7 +2021,6 @@ class CoursesTestMixinBase(SuperuserCreateMixin):
                 mock_get_grule.return_value = \
                     self.get_hacked_session_grading_rule(bonus_points=2)
         """
-        from course.utils import FlowSessionGradingRule
         defaults = deepcopy(self.default_session_grading_rule)
         defaults.update(kwargs)
         return FlowSessionGradingRule(**defaults)
@@ -1862,34 +2077,38 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
     courses_setup_list = SINGLE_COURSE_SETUP_LIST
     initial_commit_sha = None
 
+    # Set to False in classes whose setUp logs in some other user anyway.
+    force_login_student_for_each_test = True
+
     @classmethod
     def setUpTestData(cls):  # noqa
         super().setUpTestData()
-        assert len(cls.course_qset) == 1
-        cls.course = cls.course_qset.first()
+        assert len(cls.courses) == 1
+        cls.course = cls.courses[0]
         if cls.initial_commit_sha is not None:
             cls.course.active_git_commit_sha = cls.initial_commit_sha
             cls.course.save()
 
-        cls.instructor_participation = Participation.objects.filter(
-            course=cls.course,
-            roles__identifier="instructor",
-            status=participation_status.active
-        ).first()
+        # One row per (participation, role), first participation per role wins.
+        participations_by_role = {}
+        for participation in (
+                Participation.objects.filter(
+                    course=cls.course,
+                    roles__identifier__in=["instructor", "student", "ta"],
+                    status=participation_status.active)
+                .annotate(role_identifier=F("roles__identifier"))
+                .select_related("user")
+                .order_by("pk")):
+            participations_by_role.setdefault(
+                participation.role_identifier, participation)
+
+        cls.instructor_participation = participations_by_role.get("instructor")
         assert cls.instructor_participation
 
-        cls.student_participation = Participation.objects.filter(
-            course=cls.course,
-            roles__identifier="student",
-            status=participation_status.active
-        ).first()
+        cls.student_participation = participations_by_role.get("student")
         assert cls.student_participation
 
-        cls.ta_participation = Participation.objects.filter(
-            course=cls.course,
-            roles__identifier="ta",
-            status=participation_status.active
-        ).first()
+        cls.ta_participation = participations_by_role.get("ta")
         assert cls.ta_participation
 
         cls.course_page_url = cls.get_course_page_url()
@@ -1904,7 +2123,8 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
         self.student_participation.refresh_from_db()
         self.ta_participation.refresh_from_db()
 
-        self.client.force_login(self.student_participation.user)
+        if self.force_login_student_for_each_test:
+            self.client.force_login(self.student_participation.user)
 
     @classmethod
     def get_default_course(cls):
@@ -1915,7 +2135,6 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
         return cls.get_default_course().identifier
 
     def copy_course_dict_and_set_attrs_for_post(self, attrs_dict={}):
-        from course.models import Course
         kwargs = Course.objects.first().__dict__
         kwargs.update(attrs_dict)
 
@@ -1930,7 +2149,6 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
         request = rf.get(cls.get_course_page_url())
         request.user = user
 
-        from course.utils import CoursePageContext
         pctx = CoursePageContext(request, cls.course.identifier)
         return pctx
 
@@ -1963,14 +2181,12 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
         if isinstance(commit_sha, str):
             commit_sha = commit_sha.encode()
 
-        from course.content import get_flow_desc
         with cls.get_course_page_context(user) as pctx:
             flow_desc = get_flow_desc(
                 pctx.repo, pctx.course, flow_id, commit_sha)
 
         # }}}
 
-        from relate.utils import struct_to_dict, dict_to_struct
         flow_desc_dict = struct_to_dict(flow_desc)
 
         if del_rules:
@@ -1985,7 +2201,6 @@ class SingleCourseTestMixin(CoursesTestMixinBase):
 
     def get_hacked_flow_desc_with_access_rule_tags(self, rule_tags):
         assert isinstance(rule_tags, list)
-        from relate.utils import struct_to_dict, dict_to_struct
         hacked_flow_desc_dict = self.get_hacked_flow_desc(as_dict=True)
         rules = hacked_flow_desc_dict["rules"]
         rules_dict = struct_to_dict(rules)
@@ -2007,9 +2222,9 @@ class TwoCourseTestMixin(CoursesTestMixinBase):
     @classmethod
     def setUpTestData(cls):  # noqa
         super().setUpTestData()
-        assert len(cls.course_qset) == 2, (
+        assert len(cls.courses) == 2, (
             "'courses_setup_list' should contain two courses")
-        cls.course1 = cls.course_qset.first()
+        cls.course1, cls.course2 = cls.courses
         cls.course1_instructor_participation = Participation.objects.filter(
             course=cls.course1,
             roles__identifier="instructor",
@@ -2032,7 +2247,6 @@ class TwoCourseTestMixin(CoursesTestMixinBase):
         assert cls.course1_ta_participation
         cls.course1_page_url = cls.get_course_page_url(cls.course1.identifier)
 
-        cls.course2 = cls.course_qset.last()
         cls.course2_instructor_participation = Participation.objects.filter(
             course=cls.course2,
             roles__identifier="instructor",
@@ -2865,7 +3079,6 @@ class HackRepoMixin:
 
         assert isinstance(grade_info, GradeInfo)
         if not expected_grade_info_dict:
-            import json
             error_msg = ("\n%s" % json.dumps(OrderedDict(
                 sorted(
                     [(k, v) for (k, v) in grade_info.__dict__.items()])),
@@ -36,7 +36,8 @@ class GetFlowSessionsTest(APITestMixin, TestCase):
         self.client.force_login(self.instructor_participation.user)
 
     def test_success(self):
-        self.start_flow(self.flow_id)
+        self.start_flow_without_view(
+            self.flow_id, self.instructor_participation)
         token = self.create_token()
 
         resp = self.client.get(
@@ -46,7 +47,8 @@ class GetFlowSessionsTest(APITestMixin, TestCase):
         self.assertEqual(resp.status_code, 200)
 
     def test_fail_flow_id_not_supplied(self):
-        self.start_flow(self.flow_id)
+        self.start_flow_without_view(
+            self.flow_id, self.instructor_participation)
         token = self.create_token()
 
         resp = self.client.get(
@@ -56,7 +58,8 @@ class GetFlowSessionsTest(APITestMixin, TestCase):
         self.assertEqual(resp.status_code, 400)
 
     def test_fail_no_permission(self):
-        self.start_flow(self.flow_id)
+        self.start_flow_without_view(
+            self.flow_id, self.instructor_participation)
         token = self.create_token(participation=self.student_participation)
 
         resp = self.client.get(
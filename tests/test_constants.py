@@ -72,3 +72,19 @@ class IsExpirationModeAllowedTest(unittest.TestCase):
                 constants.is_expiration_mode_allowed(expmode, permissions))
 
         self.assertEqual(expected_error_msg, str(cm.exception))
+
+
+class ChoiceValuesTest(unittest.TestCase):
+    # test course.constants.*_VALUES
+    def test_values_match_choices(self):
+        for choices, values in [
+                (constants.FLOW_PERMISSION_CHOICES,
+                    constants.FLOW_PERMISSION_VALUES),
+                (constants.FLOW_SESSION_EXPIRATION_MODE_CHOICES,
+                    constants.FLOW_SESSION_EXPIRATION_MODE_VALUES),
+                (constants.FLOW_RULE_KIND_CHOICES,
+                    constants.FLOW_RULE_KIND_VALUES),
+                ]:
+            with self.subTest(choices=choices):
+                self.assertIsInstance(values, frozenset)
+                self.assertSetEqual(set(dict(choices)), values)
@@ -1392,4 +1392,26 @@ class ListFlowIdsTest(unittest.TestCase):
         self.assertEqual(content.list_flow_ids(
             self.repo, self.commit_sha), ["flow_a", "flow_b", "flow_c"])
 
+
+class ExtractTitleFromMarkupTest(unittest.TestCase):
+    # test content.extract_title_from_markup
+    def test_title_found(self):
+        self.assertEqual(
+            content.extract_title_from_markup("some text\n##  My *Title*\n"),
+            "My *Title*")
+
+    def test_first_heading_wins(self):
+        self.assertEqual(
+            content.extract_title_from_markup("#First\n# Second"), "First")
+
+    def test_no_title(self):
+        self.assertIsNone(content.extract_title_from_markup("no\n heading\n#"))
+
+    def test_only_first_ten_lines(self):
+        self.assertIsNone(
+            content.extract_title_from_markup("\n" * 10 + "# Too late"))
+        self.assertEqual(
+            content.extract_title_from_markup("\n" * 9 + "# Just in time"),
+            "Just in time")
+
 # vim: fdm=marker
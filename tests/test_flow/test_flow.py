@@ -3283,6 +3283,39 @@ class PostStartFlowTest(SingleCourseTestMixin, TestCase):
         self.assertEqual(self.mock_lock_down_if_needed.call_count, 1)
 
 
+class StartFlowWithoutViewTest(SingleCourseTestMixin, TestCase):
+    # test CoursesTestMixinBase.start_flow_without_view
+
+    flow_id = QUIZ_FLOW_ID
+
+    def get_session_state(self, session):
+        return (
+            session.flow_id, session.participation, session.user,
+            session.access_rules_tag, session.expiration_mode,
+            session.in_progress, session.page_count,
+            list(session.page_data.order_by("page_ordinal").values_list(
+                "page_ordinal", "group_id", "page_id")))
+
+    def test_same_as_start_flow(self):
+        self.start_flow(self.flow_id)
+        view_params = self.default_flow_params
+        view_session = models.FlowSession.objects.get(
+            pk=view_params["flow_session_id"])
+        view_session_state = self.get_session_state(view_session)
+        view_session.delete()
+
+        session = self.start_flow_without_view(
+            self.flow_id, self.student_participation)
+        self.assertEqual(self.default_flow_params, {
+            "course_identifier": view_params["course_identifier"],
+            "flow_session_id": str(session.id)})
+        self.assertEqual(self.get_default_flow_session_id(None), str(session.id))
+        self.assertEqual(
+            self.get_session_state(
+                models.FlowSession.objects.get(pk=session.pk)),
+            view_session_state)
+
+
 class ViewResumeFlowTest(SingleCourseTestMixin, TestCase):
     # test flow.view_resume_flow
 
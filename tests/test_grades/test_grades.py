@@ -611,7 +611,7 @@ class GetGradeTableTest(GradesTestMixin, TestCase):
             gchange_kwargs = kwarg_list.pop(0)
             factories.GradeChangeFactory(**gchange_kwargs)
 
-        participations, grading_opps, grade_table = (
+        participations, grading_opps, grade_state_machines = (
             grades.get_grade_table(self.course))
 
         self.assertEqual(
@@ -626,21 +626,29 @@ class GetGradeTableTest(GradesTestMixin, TestCase):
         # ordered by identifier
         self.assertListEqual(grading_opps, [shown_gopp, hidden_gopp, self.gopp])
 
-        self.assertEqual(len(grade_table), 5)
-        for i in range(5):
-            self.assertEqual(len(grade_table[i]), 3)
+        self.assertEqual(len(grade_state_machines), 5)
+        for participation in participations:
+            self.assertEqual(
+                set(grade_state_machines[participation.pk]),
+                {gopp.pk for gopp in grading_opps})
+
+        def get_percentage(participation, gopp):
+            return grade_state_machines[participation.pk][gopp.pk].percentage()
 
-        self.assertEqual(grade_table[2][0].grade_state_machine.percentage(), 40)
-        self.assertEqual(grade_table[2][1].grade_state_machine.percentage(), 20)
-        self.assertEqual(grade_table[2][2].grade_state_machine.percentage(), None)
+        self.assertEqual(
+            get_percentage(self.student_participation, shown_gopp), 40)
+        self.assertEqual(
+            get_percentage(self.student_participation, hidden_gopp), 20)
+        self.assertEqual(
+            get_percentage(self.student_participation, self.gopp), None)
 
-        self.assertEqual(grade_table[3][0].grade_state_machine.percentage(), 90)
-        self.assertEqual(grade_table[3][1].grade_state_machine.percentage(), 70)
-        self.assertEqual(grade_table[3][2].grade_state_machine.percentage(), None)
+        self.assertEqual(get_percentage(self.ptpt1, shown_gopp), 90)
+        self.assertEqual(get_percentage(self.ptpt1, hidden_gopp), 70)
+        self.assertEqual(get_percentage(self.ptpt1, self.gopp), None)
 
-        self.assertEqual(grade_table[4][0].grade_state_machine.percentage(), 35)
-        self.assertEqual(grade_table[4][1].grade_state_machine.percentage(), 65)
-        self.assertEqual(grade_table[4][2].grade_state_machine.percentage(), None)
+        self.assertEqual(get_percentage(self.ptpt2, shown_gopp), 35)
+        self.assertEqual(get_percentage(self.ptpt2, hidden_gopp), 65)
+        self.assertEqual(get_percentage(self.ptpt2, self.gopp), None)
 
     def test(self):
         for i in range(10):
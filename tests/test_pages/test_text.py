@@ -25,7 +25,7 @@ from django.test import TestCase
 from django import forms
 import unittest
 
-from relate.utils import Struct
+from relate.utils import Struct, dict_to_struct
 
 from course.validation import ValidationError
 
@@ -33,7 +33,8 @@ from course.page.text import (
     TextAnswerForm, get_validator_class, parse_validator, multiple_to_single_spaces,
     CaseSensitivePlainMatcher, PlainMatcher, RegexMatcher,
     CaseSensitiveRegexMatcher, SymbolicExpressionMatcher, float_or_sympy_evalf,
-    FloatMatcher, get_matcher_class, parse_matcher,
+    FloatMatcher, get_matcher_class, parse_matcher, combine_regex_matchers,
+    regex_has_nested_unbounded_repeat, TextQuestion,
 )
 
 from tests.test_sandbox import (
@@ -246,6 +247,87 @@ class MatcherTest(unittest.TestCase):
         self.assertEqual(matcher.grade("linear ").correctness, 0)
         self.assertEqual(matcher.correct_answer_text(), None)
 
+    def test_case_sensitive_regex_matcher_literal(self):
+        matcher = CaseSensitiveRegexMatcher(None, "",
+                Struct({"type": "case_sens_regex", "value": "map"}))
+        self.assertEqual(matcher.grade("map").correctness, 1)
+        self.assertEqual(matcher.grade("maps").correctness, 1)
+        self.assertEqual(matcher.grade("Map").correctness, 0)
+        self.assertEqual(matcher.grade(" map").correctness, 0)
+
+        # flags other than IGNORECASE do not change literal matching
+        matcher = RegexMatcher(None, "",
+                Struct({"type": "regex", "value": "map", "flags": ["M"]}))
+        self.assertEqual(matcher.grade("maps").correctness, 1)
+        self.assertEqual(matcher.grade("MAP").correctness, 0)
+
+
+class RegexHasNestedUnboundedRepeatTest(unittest.TestCase):
+    # test regex_has_nested_unbounded_repeat
+    def test_nested(self):
+        for pattern in [r"(a+)+", r"(?:\w+\s?)*$", r"x(a|b*)*", r"((ab)*c)+"]:
+            with self.subTest(pattern=pattern):
+                self.assertTrue(regex_has_nested_unbounded_repeat(pattern))
+
+    def test_not_nested(self):
+        for pattern in [r"(?:linear\s+)?\s*map", r"a+b*", r"(ab){2,5}", r"(a+){3}"]:
+            with self.subTest(pattern=pattern):
+                self.assertFalse(regex_has_nested_unbounded_repeat(pattern))
+
+    def test_regex_matcher_warns(self):
+        mock_vctx = mock.MagicMock()
+        RegexMatcher(mock_vctx, "some_where",
+                Struct({"type": "regex", "value": r"(a+)+b"}))
+        self.assertEqual(mock_vctx.add_warning.call_count, 1)
+
+        mock_vctx = mock.MagicMock()
+        RegexMatcher(mock_vctx, "some_where",
+                Struct({"type": "regex", "value": r"a+b"}))
+        self.assertEqual(mock_vctx.add_warning.call_count, 0)
+
+
+class CombineRegexMatchersTest(unittest.TestCase):
+    # test combine_regex_matchers
+    def make_matcher(self, value, **kwargs):
+        return RegexMatcher(None, "",
+                Struct(dict(type="regex", value=value, **kwargs)))
+
+    def test_too_few(self):
+        self.assertIsNone(combine_regex_matchers([]))
+        self.assertIsNone(combine_regex_matchers([self.make_matcher("a")]))
+
+    def test_with_groups(self):
+        self.assertIsNone(combine_regex_matchers(
+            [self.make_matcher("a"), self.make_matcher(r"(b)\1")]))
+
+    def test_with_global_inline_flags(self):
+        self.assertIsNone(combine_regex_matchers(
+            [self.make_matcher("a"), self.make_matcher("(?i)b")]))
+
+    def test_best_match(self):
+        half = self.make_matcher("lin", correctness=0.5)
+        full = self.make_matcher("linear")
+        other_full = self.make_matcher("lin")
+        regex, ordered = combine_regex_matchers([half, full, other_full])
+        self.assertEqual(ordered, [full, other_full, half])
+
+        def best(s):
+            match = regex.match(s)
+            return None if match is None else ordered[match.lastindex - 1]
+
+        self.assertIs(best("Linear map"), full)
+        self.assertIs(best("lin"), other_full)
+        self.assertIsNone(best("map"))
+
+    def test_flags(self):
+        regex, ordered = combine_regex_matchers([
+            self.make_matcher("a b # comment", flags=["X"]),
+            self.make_matcher("c", flags=[]),
+            ])
+        self.assertIsNotNone(regex.match("ab"))
+        self.assertIsNotNone(regex.match("c"))
+        self.assertIsNone(regex.match("C"))
+
 
 class SymbolicExpressionMatcherTest(unittest.TestCase):
     def test_symbolic_expression_matcher_pymbolic_import_error(self):
@@ -301,6 +383,11 @@ class SymbolicExpressionMatcherTest(unittest.TestCase):
             mock_simplify.side_effect = ValueError("my simplify error")
             self.assertEqual(matcher.grade("abcd").correctness, 0)
 
+            # equal without simplify
+            self.assertEqual(matcher.grade("1/A").correctness, 1)
+            self.assertEqual(matcher.grade("(A+1)/A - 1").correctness, 1)
+            self.assertEqual(mock_simplify.call_count, 1)
+
 
 class FloatOrSympyEvalfTest(unittest.TestCase):
     # test float_or_sympy_evalf
@@ -452,6 +539,35 @@ class FloatMatcherTest(unittest.TestCase):
         self.assertEqual(matcher.grade(float("nan")).correctness, 0)
         self.assertEqual(matcher.grade(float("inf")).correctness, 0)
 
+    def test_float_matcher_grade_atol_and_rtol(self):
+        matcher = FloatMatcher(None, "",
+                               Struct(
+                                   {"type": "float",
+                                    "value": "100",
+                                    "atol": 0.5,
+                                    "rtol": 0.01
+                                    }))
+        # both tolerances must be met
+        self.assertEqual(matcher.grade(100.4).correctness, 1)
+        self.assertEqual(matcher.grade(100.6).correctness, 0)
+
+        matcher = FloatMatcher(None, "",
+                               Struct(
+                                   {"type": "float",
+                                    "value": "100",
+                                    "atol": 5,
+                                    "rtol": 0.01
+                                    }))
+        self.assertEqual(matcher.grade(99.5).correctness, 1)
+        self.assertEqual(matcher.grade(98.5).correctness, 0)
+
+    def test_float_matcher_value_zero_atol_not_present_no_vctx(self):
+        matcher = FloatMatcher(None, "",
+                               Struct(
+                                   {"type": "float",
+                                    "value": "0"}))
+        self.assertEqual(matcher.grade(5).correctness, 1)
+
     def test_float_matcher_grade_nan(self):
         matcher = FloatMatcher(None, "",
                                Struct(
@@ -551,6 +667,84 @@ class ParseMatcherTest(unittest.TestCase):
         self.assertIn("some where: must be struct or string", str(cm.exception))
 
 
+class TextQuestionGradeTest(unittest.TestCase):
+    # test TextQuestion.grade
+    def make_page(self, answers):
+        return TextQuestion(None, "", dict_to_struct({
+            "id": "q", "type": "TextQuestion", "value": 1,
+            "prompt": "# Question", "answers": answers}))
+
+    def grade(self, page, answer):
+        return page.grade(None, None, {"answer": answer}, None)
+
+    def test_stops_at_best_possible_correctness(self):
+        page = self.make_page([
+            "<plain>x+1",
+            {"type": "sym_expr", "value": "1+x"},
+            ])
+        with mock.patch(
+                "course.page.text.SymbolicExpressionMatcher.grade") as mock_grade:
+            self.assertEqual(self.grade(page, "x+1").correctness, 1)
+            self.assertEqual(mock_grade.call_count, 0)
+
+    def test_later_matcher_with_higher_correctness_wins(self):
+        page = self.make_page([
+            {"type": "plain", "value": "x+1", "correctness": 0.5,
+             "feedback": "half"},
+            {"type": "plain", "value": "x+1", "feedback": "first full"},
+            {"type": "plain", "value": "x+1", "feedback": "second full"},
+            ])
+        afb = self.grade(page, "x+1")
+        self.assertEqual(afb.correctness, 1)
+        self.assertEqual(afb.feedback, "first full")
+
+    def test_combined_regex_not_run_after_best_possible_correctness(self):
+        page = self.make_page([
+            "<plain>linear map",
+            {"type": "regex", "value": "lin", "correctness": 0.5},
+            {"type": "regex", "value": "linear"},
+            ])
+        page.combined_regex = mock.MagicMock(wraps=page.combined_regex)
+        self.assertEqual(self.grade(page, "linear map").correctness, 1)
+        self.assertEqual(page.combined_regex.match.call_count, 0)
+
+        self.assertEqual(self.grade(page, "lin").correctness, 0.5)
+        self.assertEqual(page.combined_regex.match.call_count, 1)
+
+    def test_combined_regexes_same_as_one_at_a_time(self):
+        answers = [
+            {"type": "regex", "value": "lin", "correctness": 0.5,
+             "feedback": "half", "flags": ["I"]},
+            {"type": "regex", "value": "linear\\s+map", "feedback": "exact",
+             "flags": []},
+            {"type": "regex", "value": "LINEAR MAP", "correctness": 0.8,
+             "feedback": "upper", "flags": ["IGNORECASE"]},
+            {"type": "regex", "value": "linear [ ]* function # spaces ignored",
+             "correctness": 0.8, "feedback": "function", "flags": ["X", "I"]},
+            {"type": "regex", "value": "operator", "correctness": 0,
+             "feedback": "wrong"},
+            # provides the correct answer text, which regexes cannot
+            "<plain>linear map",
+            ]
+        combined_page = self.make_page(answers)
+        self.assertIsNotNone(combined_page.combined_regex)
+
+        one_at_a_time_page = self.make_page(answers)
+        one_at_a_time_page.combined_regex = None
+        one_at_a_time_page.combined_regex_matchers = []
+
+        for answer in [
+                "linear map", "Linear map", "LINEAR MAP", "linear   map",
+                "Linearfunction", "LINEAR FUNCTION", "lin", "LINE",
+                "operator", "map", ""]:
+            with self.subTest(answer=answer):
+                combined_afb = self.grade(combined_page, answer)
+                one_at_a_time_afb = self.grade(one_at_a_time_page, answer)
+                self.assertEqual(
+                    (combined_afb.correctness, combined_afb.feedback),
+                    (one_at_a_time_afb.correctness, one_at_a_time_afb.feedback))
+
+
 class TextQuestionTest(SingleCoursePageSandboxTestBaseMixin, TestCase):
 
     # {{{ test TextQuestionBase
@@ -23,6 +23,7 @@ THE SOFTWARE.
 import pytest
 from django.test import TestCase
 
+from course import grades
 from course.constants import participation_status
 
 from tests import factories
@@ -134,3 +135,100 @@ class UpdateCouresOrUserSignalTest(SingleCourseTestMixin, TestCase):
             self.course.save()
             self.assertEqual(mock_pprvl_get.call_count, 0)
             self.assertEqual(mock_handle_enrollment.call_count, 0)
+
+
+class ClearGradebookCacheSignalTest(TestCase):
+    # test receivers.clear_gradebook_cache_on_change
+
+    def setUp(self):
+        super().setUp()
+        self.course = factories.CourseFactory()
+        self.participation = factories.ParticipationFactory(course=self.course)
+        self.gopp = factories.GradingOpportunityFactory(course=self.course)
+        grades.clear_gradebook_cache(self.course.pk)
+
+    def get_grade_table(self):
+        participations, grading_opps, _ = grades.get_grade_table(self.course)
+        return participations, grading_opps
+
+    def test_cached(self):
+        self.get_grade_table()
+        with self.assertNumQueries(1):
+            # only the grade changes are queried
+            participations, grading_opps = self.get_grade_table()
+
+        self.assertEqual(participations, [self.participation])
+        self.assertEqual(grading_opps, [self.gopp])
+
+    def test_participation_users_loaded(self):
+        participations, _ = self.get_grade_table()
+        with self.assertNumQueries(0):
+            # the grade book renders these for each participant
+            participations[0].user.get_full_name()
+            participations[0].user.get_masked_profile()
+
+    def test_participation_saved(self):
+        self.get_grade_table()
+        new_participation = factories.ParticipationFactory(course=self.course)
+        participations, _ = self.get_grade_table()
+        self.assertEqual(participations, [self.participation, new_participation])
+
+        new_participation.status = participation_status.dropped
+        new_participation.save()
+        participations, _ = self.get_grade_table()
+        self.assertEqual(participations, [self.participation])
+
+    def test_participation_deleted(self):
+        self.get_grade_table()
+        self.participation.delete()
+        participations, _ = self.get_grade_table()
+        self.assertEqual(participations, [])
+
+    def test_grading_opportunity_saved(self):
+        self.get_grade_table()
+        self.gopp.shown_in_grade_book = False
+        self.gopp.save()
+        _, grading_opps = self.get_grade_table()
+        self.assertEqual(grading_opps, [])
+
+    def test_grading_opportunity_deleted(self):
+        self.get_grade_table()
+        self.gopp.delete()
+        _, grading_opps = self.get_grade_table()
+        self.assertEqual(grading_opps, [])
+
+    def test_participation_roles_changed(self):
+        role = factories.ParticipationRoleFactory(course=self.course)
+        self.get_grade_table()
+        self.participation.roles.add(role)
+        with self.assertNumQueries(3):
+            # the cleared participations and opportunities are queried again
+            self.get_grade_table()
+
+    def test_user_renamed(self):
+        self.get_grade_table()
+        user = self.participation.user
+        user.first_name = "Renamed"
+        user.save()
+        participations, _ = self.get_grade_table()
+        self.assertEqual(participations[0].user.first_name, "Renamed")
+
+    def test_user_signed_in(self):
+        self.get_grade_table()
+        user = self.participation.user
+        user.save(update_fields=["last_login"])
+        with self.assertNumQueries(1):
+            self.get_grade_table()
+
+    def test_cleared_again_on_commit(self):
+        self.get_grade_table()
+        with self.captureOnCommitCallbacks() as callbacks:
+            factories.ParticipationFactory(course=self.course)
+
+        # as if another request had refilled the cache before the commit
+        self.get_grade_table()
+        for callback in callbacks:
+            callback()
+        with self.assertNumQueries(3):
+            # the cleared participations and opportunities are queried again
+            self.get_grade_table()